@@ -0,0 +1,84 @@
+import argparse
+
+import numpy as np
+import torch
+
+from benchmarks.core import register_benchmark
+from qiqc.registry import AGGREGATOR_REGISTRY
+from qiqc.registry import ENCODER_REGISTRY
+
+
+BATCH_SIZES = [32, 128, 512]
+
+
+def build_config(cls, maxlen):
+    # Defaults of the module with the encoder size of the baseline preset
+    parser = argparse.ArgumentParser()
+    cls.add_args(parser)
+    config = parser.parse_args([])
+    config.maxlen = maxlen
+    config.encoder_n_hidden = 128
+    config.encoder_n_layers = 2
+    return config
+
+
+def build_inputs(data, batch_size, n_features):
+    # Lengths of the synthetic questions, padded to the longest one in
+    # the batch as BinaryClassifier.embed does. Questions are drawn with
+    # replacement when there are fewer than batch_size of them.
+    tokens = data.tokens
+    if len(tokens) >= batch_size:
+        indices = range(batch_size)
+    else:
+        indices = np.random.RandomState(0).randint(0, len(tokens), batch_size)
+    lengths = torch.tensor(
+        [min(len(tokens[i]), data.maxlen) for i in indices])
+    maxlen = int(lengths.max())
+    mask = torch.arange(maxlen)[None] < lengths[:, None]
+    h = torch.randn(batch_size, maxlen, n_features)
+    return h, mask
+
+
+def run(module, h, mask, backward):
+    if backward:
+        module(h, mask).sum().backward()
+    else:
+        with torch.inference_mode():
+            module(h, mask)
+
+
+def bench_encoder(data, encoder, batch_size, backward):
+    torch.manual_seed(0)
+    encoder = ENCODER_REGISTRY[encoder]
+    encoder = encoder(build_config(encoder, data.maxlen), data.embedding_dim)
+    encoder.train(backward)
+    h, mask = build_inputs(data, batch_size, data.embedding_dim)
+    h.requires_grad_(backward)
+    return lambda: run(encoder, h, mask, backward), batch_size
+
+
+def bench_aggregator(data, aggregator, batch_size, backward):
+    # Inputs are outputs of the bidirectional LSTM of the baseline preset
+    torch.manual_seed(0)
+    n_hidden = 2 * 128
+    aggregator = AGGREGATOR_REGISTRY[aggregator]
+    if hasattr(aggregator, 'add_args'):
+        aggregator = aggregator(
+            build_config(aggregator, data.maxlen), n_hidden)
+    else:
+        aggregator = aggregator()
+    h, mask = build_inputs(data, batch_size, n_hidden)
+    h.requires_grad_(backward)
+    return lambda: run(aggregator, h, mask, backward), batch_size
+
+
+for batch_size in BATCH_SIZES:
+    for mode, backward in [('forward', False), ('backward', True)]:
+        for name in ENCODER_REGISTRY:
+            register_benchmark(
+                f'encoder/{name}/{mode}/batch{batch_size}', encoder=name,
+                batch_size=batch_size, backward=backward)(bench_encoder)
+        for name in AGGREGATOR_REGISTRY:
+            register_benchmark(
+                f'aggregator/{name}/{mode}/batch{batch_size}', aggregator=name,
+                batch_size=batch_size, backward=backward)(bench_aggregator)
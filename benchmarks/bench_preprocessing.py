@@ -0,0 +1,122 @@
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.core import register_benchmark
+from qiqc.datasets import QIQCDataset
+from qiqc.preprocessing.modules import WordVocab
+from qiqc.preprocessing.preprocessors import WordbasedPreprocessor
+from qiqc.registry import NORMALIZER_REGISTRY
+from qiqc.registry import SENTENCE_EXTRA_FEATURIZER_REGISTRY
+from qiqc.registry import TOKENIZER_REGISTRY
+from qiqc.registry import WORD_EMBEDDING_FEATURIZER_REGISTRY
+from qiqc.registry import WORD_EXTRA_FEATURIZER_REGISTRY
+from qiqc.utils import ApplyNdArray, Pipeline
+
+
+def bench_normalizer(data, normalizer):
+    normalizer = NORMALIZER_REGISTRY[normalizer]
+    questions = data.questions
+    return lambda: [normalizer(x) for x in questions], len(questions)
+
+
+def bench_tokenizer(data, tokenizer):
+    tokenizer = TOKENIZER_REGISTRY[tokenizer]
+    normalized = data.normalized
+    return lambda: [tokenizer(x) for x in normalized], len(normalized)
+
+
+for name in NORMALIZER_REGISTRY:
+    register_benchmark(f'normalizer/{name}', normalizer=name)(bench_normalizer)
+for name in TOKENIZER_REGISTRY:
+    register_benchmark(f'tokenizer/{name}', tokenizer=name)(bench_tokenizer)
+
+
+@register_benchmark('vocab/add_documents')
+def bench_add_documents(data):
+    tokens = data.tokens
+
+    def func():
+        WordVocab().add_documents(tokens, 'train')
+    return func, len(tokens)
+
+
+@register_benchmark('vocab/build')
+def bench_build_vocab(data):
+    vocab = WordVocab()
+    vocab.add_documents(data.tokens, 'train')
+    return vocab.build, len(vocab.counter)
+
+
+@register_benchmark('preprocessor/build_tokenids')
+def bench_build_tokenids(data):
+    dataset = QIQCDataset(pd.DataFrame(dict(tokens=data.tokens)))
+    config = argparse.Namespace(maxlen=data.maxlen)
+    preprocessor = WordbasedPreprocessor()
+    vocab = data.vocab
+
+    def func():
+        preprocessor.build_tokenids([dataset], vocab, config)
+    return func, len(data.tokens)
+
+
+def bench_sentence_featurizer(data, featurizer):
+    featurizer = SENTENCE_EXTRA_FEATURIZER_REGISTRY[featurizer]()
+    apply = ApplyNdArray(featurizer, dtype='f', dims=(featurizer.n_dims,))
+    questions = data.questions
+    return lambda: apply(questions), len(questions)
+
+
+def bench_word_extra_featurizer(data, featurizer):
+    featurizer = WORD_EXTRA_FEATURIZER_REGISTRY[featurizer]()
+    data.pretrained_vectors  # Sets unknown words of the vocabulary
+    vocab = data.vocab
+    return lambda: featurizer(vocab), len(vocab)
+
+
+def bench_word_embedding_featurizer(data, featurizer):
+    # Fine-tuning options of the baseline preset, over a single epoch
+    name = featurizer
+    featurizer = WORD_EMBEDDING_FEATURIZER_REGISTRY[name]
+    parser = argparse.ArgumentParser()
+    featurizer.add_args(parser)
+    config = parser.parse_args([])
+    prefix = f'finetune_{name}_'
+    for k, v in dict(init_unk='zeros', mincount=1, workers=1, iter=1,
+                     size=data.embedding_dim, sg=0, min_n=3,
+                     max_n=6).items():
+        if hasattr(config, prefix + k):
+            setattr(config, prefix + k, v)
+    featurizer = featurizer(config, data.vocab)
+    vectors = data.pretrained_vectors
+    dataset = QIQCDataset(pd.DataFrame(dict(tokens=data.tokens)))
+    return lambda: featurizer(vectors, [dataset]), len(data.tokens)
+
+
+for name in SENTENCE_EXTRA_FEATURIZER_REGISTRY:
+    register_benchmark(f'sentence_featurizer/{name}', featurizer=name)(
+        bench_sentence_featurizer)
+for name in WORD_EXTRA_FEATURIZER_REGISTRY:
+    register_benchmark(f'word_extra_featurizer/{name}', featurizer=name)(
+        bench_word_extra_featurizer)
+for name in WORD_EMBEDDING_FEATURIZER_REGISTRY:
+    register_benchmark(
+        f'word_embedding_featurizer/{name}', featurizer=name)(
+        bench_word_embedding_featurizer)
+
+
+def bench_apply(data, processes):
+    # Normalization and tokenization of the baseline preset, as in
+    # WordbasedPreprocessor.tokenize
+    tokenize = Pipeline(*[NORMALIZER_REGISTRY[k] for k in [
+        'lower', 'misspell', 'punct', 'number+underscore']],
+        TOKENIZER_REGISTRY['space'])
+    apply = ApplyNdArray(tokenize, processes=processes, dtype=object)
+    questions = np.asarray(data.questions, dtype=object)
+    return lambda: apply(questions), len(questions)
+
+
+for processes in [1, 2, 4]:
+    register_benchmark(f'apply/tokenize/processes{processes}',
+                       processes=processes)(bench_apply)
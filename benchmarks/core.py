@@ -0,0 +1,82 @@
+import re
+import time
+from functools import partial
+
+import numpy as np
+
+
+BENCHMARK_REGISTRY = {}
+
+
+def register_benchmark(name, **params):
+    # A benchmark sets up its inputs from the synthetic data and returns
+    # the function to time with the number of items it processes
+    def register_func(func):
+        BENCHMARK_REGISTRY[name] = partial(func, **params)
+        return func
+    return register_func
+
+
+def measure(func, min_repeat=3, min_time=1., max_repeat=1000, warmup=1):
+    # Repeats until both min_repeat runs and min_time seconds are reached
+    for i in range(warmup):
+        func()
+    times = []
+    while len(times) < max_repeat and (
+            len(times) < min_repeat or sum(times) < min_time):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run_benchmarks(data, pattern=None, **kwargs):
+    results = {}
+    for name, setup in BENCHMARK_REGISTRY.items():
+        if pattern is not None and re.search(pattern, name) is None:
+            continue
+        try:
+            func, n_items = setup(data)
+            times = measure(func, **kwargs)
+        except Exception as e:
+            results[name] = dict(error=repr(e))
+            message = ' '.join(str(e).split())[:60]
+            print(f'{name:<48} error: {type(e).__name__}: {message}')
+            continue
+        median = float(np.median(times))
+        results[name] = dict(
+            n_items=n_items,
+            repeat=len(times),
+            min=min(times),
+            median=median,
+            mean=float(np.mean(times)),
+            std=float(np.std(times)),
+            items_per_sec=n_items / median if median > 0 else None,
+        )
+        print(f'{name:<48} {median * 1e3:10.3f} ms '
+              f'{n_items / median:14.1f} items/s')
+    return results
+
+
+def compare(results, baseline, threshold=0.1):
+    # Ratios of median times to the baseline, > 1 is slower
+    rows = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None or 'median' not in base or 'median' not in result:
+            continue
+        if base['n_items'] != result['n_items']:
+            # Per-item times of different input sizes
+            ratio = (result['median'] / result['n_items']) / (
+                base['median'] / base['n_items'])
+        else:
+            ratio = result['median'] / base['median']
+        status = ''
+        if ratio > 1 + threshold:
+            status = 'slower'
+        elif ratio < 1 / (1 + threshold):
+            status = 'faster'
+        rows.append(dict(
+            name=name, baseline=base['median'], median=result['median'],
+            ratio=ratio, status=status))
+    return rows
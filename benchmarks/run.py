@@ -0,0 +1,84 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import torch
+
+import benchmarks.bench_modules  # NOQA
+import benchmarks.bench_preprocessing  # NOQA
+from benchmarks.core import compare, run_benchmarks
+from benchmarks.synthetic import SyntheticData
+
+
+def get_meta(config):
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL,
+            cwd=Path(__file__).parent).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return dict(
+        time=time.strftime('%Y-%m-%dT%H:%M:%S'),
+        commit=commit,
+        python=sys.version.split()[0],
+        numpy=np.__version__,
+        torch=torch.__version__,
+        platform=platform.platform(),
+        cpu_count=os.cpu_count(),
+        torch_threads=torch.get_num_threads(),
+        n_questions=config.n_questions,
+        seed=config.seed,
+    )
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--output', '-o', type=Path,
+                        default=Path('benchmarks.json'))
+    parser.add_argument('--baseline', '-b', type=Path)
+    parser.add_argument('--filter', '-k', type=str,
+                        help='Regular expression of benchmark names')
+    parser.add_argument('--n-questions', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--min-repeat', type=int, default=3)
+    parser.add_argument('--min-time', type=float, default=1.)
+    parser.add_argument('--threads', type=int)
+    parser.add_argument('--threshold', type=float, default=0.1,
+                        help='Relative change reported as a regression')
+    parser.add_argument('--fail-on-regression', action='store_true')
+    config = parser.parse_args(args)
+
+    if config.threads is not None:
+        torch.set_num_threads(config.threads)
+    data = SyntheticData(config.n_questions, config.seed)
+    results = run_benchmarks(
+        data, config.filter, min_repeat=config.min_repeat,
+        min_time=config.min_time)
+    with open(config.output, 'w') as f:
+        json.dump(dict(meta=get_meta(config), results=results), f, indent=2)
+    print(f'Saved {config.output}')
+
+    if config.baseline is None:
+        return
+    with open(config.baseline) as f:
+        baseline = json.load(f)['results']
+    rows = compare(results, baseline, config.threshold)
+    print(f'\n{"name":<48} {"baseline":>10} {"current":>10} {"ratio":>7}')
+    for row in rows:
+        print(f'{row["name"]:<48} {row["baseline"] * 1e3:8.3f}ms '
+              f'{row["median"] * 1e3:8.3f}ms {row["ratio"]:7.3f} '
+              f'{row["status"]}')
+    n_slower = sum(row['status'] == 'slower' for row in rows)
+    print(f'{n_slower} slower / {len(rows)} compared')
+    if config.fail_on_regression and n_slower > 0:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,142 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+from benchmarks.synthetic import generate_dataframes
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def synthesize(datadir, n_rows, seed=0):
+    datadir.mkdir(parents=True, exist_ok=True)
+    if not (datadir / 'train.csv').exists():
+        train_df, test_df = generate_dataframes(n_rows, seed=seed)
+        train_df.to_csv(datadir / 'train.csv', index=False)
+        test_df.to_csv(datadir / 'test.csv', index=False)
+    return datadir
+
+
+def run_train(config, datadir, n_rows, outdir_top, extra_args):
+    # Test mode uses random vectors instead of pretrained ones. Peak RSS
+    # is the high-water mark of the training process, or of the largest of
+    # its reaped children (e.g. preprocessing pools).
+    args = [
+        sys.executable, str(config.train_script),
+        '--modelfile', str(config.modelfile), '--test',
+        '--n-rows', str(n_rows), '--outdir-top', str(outdir_top),
+        '--cv-part', '1',
+        '--epochs', str(config.epochs), '--batchsize', str(config.batchsize),
+        *extra_args]
+    env = dict(os.environ, DATADIR=str(datadir))
+    start = time.perf_counter()
+    process = subprocess.Popen(args, env=env, cwd=ROOT,
+                               stdout=subprocess.DEVNULL if config.quiet
+                               else None)
+    _, status, rusage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    # Negative signal numbers like Popen.returncode
+    if os.WIFSIGNALED(status):
+        returncode = -os.WTERMSIG(status)
+    else:
+        returncode = os.WEXITSTATUS(status)
+    if returncode != 0:
+        raise RuntimeError(f'{" ".join(args)} exited with {returncode}')
+    return wall, rusage.ru_maxrss * 1024, rusage.ru_utime + rusage.ru_stime
+
+
+def fit_exponent(sizes, values):
+    # values ~ c * size ** exponent, fitted in log-log space
+    sizes, values = np.asarray(sizes, 'f'), np.asarray(values, 'f')
+    valid = values > 0
+    if valid.sum() < 2:
+        return None, None
+    exponent, log_c = np.polyfit(
+        np.log(sizes[valid]), np.log(values[valid]), 1)
+    return float(exponent), float(np.exp(log_c))
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[10000, 100000, 1000000])
+    parser.add_argument(
+        '--modelfile', '-m', type=Path,
+        default=ROOT / 'models' / 'baseline' / 'v1_8_1_bilstm_w2v_rnd.py')
+    parser.add_argument('--train-script', type=Path,
+                        default=ROOT / 'exec' / 'train.py')
+    parser.add_argument('--epochs', type=int, default=2)
+    parser.add_argument('--batchsize', type=int, default=512)
+    parser.add_argument('--workdir', type=Path,
+                        help='Keeps synthetic datasets and outputs')
+    parser.add_argument('--output', '-o', type=Path,
+                        default=Path('scaling.json'))
+    parser.add_argument('--superlinear-threshold', type=float, default=1.15)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--quiet', action='store_true')
+    # Other arguments are passed to train.py
+    config, extra_args = parser.parse_known_args(args)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        workdir = config.workdir or Path(tmpdir)
+        runs = []
+        for n_rows in config.sizes:
+            print(f'Synthesize {n_rows} rows...')
+            datadir = synthesize(
+                workdir / 'data' / str(n_rows), n_rows, config.seed)
+            print(f'Train on {n_rows} rows...')
+            outdir_top = workdir / 'results' / str(n_rows)
+            wall, peak_rss, cpu = run_train(
+                config, datadir, n_rows, outdir_top, extra_args)
+            trace_path, = outdir_top.glob('*/*/trace.json')
+            with open(trace_path) as f:
+                stages = {row['name']: row for row in json.load(f)['summary']}
+            runs.append(dict(
+                n_rows=n_rows, wall=wall, cpu=cpu, peak_rss=peak_rss,
+                rows_per_sec=n_rows / wall, stages=stages))
+            print(f'{n_rows} rows: {wall:.1f}s, {n_rows / wall:.1f} rows/s, '
+                  f'peak RSS {peak_rss / 2 ** 20:.1f} MiB')
+
+    # Exponents of time and memory against the number of rows; stages
+    # well above 1 will dominate on the full data
+    sizes = [run['n_rows'] for run in runs]
+    fits = {}
+    names = ['total', 'peak_rss'] + list(runs[-1]['stages'])
+    for name in names:
+        if name == 'total':
+            values = [run['wall'] for run in runs]
+        elif name == 'peak_rss':
+            values = [run['peak_rss'] for run in runs]
+        else:
+            values = [run['stages'].get(name, {}).get('wall', 0)
+                      for run in runs]
+        exponent, coefficient = fit_exponent(sizes, values)
+        fits[name] = dict(
+            exponent=exponent, coefficient=coefficient, values=values,
+            superlinear=exponent is not None and
+            exponent > config.superlinear_threshold)
+
+    with open(config.output, 'w') as f:
+        json.dump(dict(sizes=sizes, runs=runs, fits=fits), f, indent=2)
+
+    header = ''.join(f'{n:>12}' for n in sizes)
+    print(f'\n{"stage":<42}{header}{"exponent":>10}')
+    for name, fit in fits.items():
+        scale = 2 ** -20 if name == 'peak_rss' else 1
+        values = ''.join(f'{v * scale:12.2f}' for v in fit['values'])
+        exponent = '' if fit['exponent'] is None else \
+            f'{fit["exponent"]:10.2f}'
+        mark = ' superlinear' if fit['superlinear'] else ''
+        print(f'{name:<42}{values}{exponent}{mark}')
+    print(f'Saved {config.output}')
+
+
+if __name__ == '__main__':
+    main()
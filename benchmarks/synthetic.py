@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+from qiqc.preprocessing.modules import WordVocab
+from qiqc.registry import NORMALIZER_REGISTRY, TOKENIZER_REGISTRY
+from qiqc.utils import cached_property
+
+
+STARTERS = [
+    'What', 'How', 'Why', 'Is', 'Can', 'Do', 'Does', 'Which', 'Should',
+    'Are', 'Who', 'Where', 'When', 'Will', 'If', 'Would', 'Has', 'I']
+FUNCTION_WORDS = [
+    'the', 'a', 'to', 'of', 'in', 'and', 'is', 'for', 'you', 'it', 'that',
+    'do', 'are', 'on', 'with', 'my', 'be', 'an', 'can', 'your', 'as', 'or',
+    'have', 'from', 'at', 'not', 'people', 'best', 'get', 'like', 'there',
+    'they', 'should', 'we', 'does', 'this', 'about', 'would', 'more', 'after']
+# Tokens exercising the normalizers: contractions, misspellings, numbers,
+# punctuation, capitals and non-ASCII characters
+SPECIAL_WORDS = [
+    "don't", "can't", "isn't", "I'm", "what's", 'demonitisation', 'watsapp',
+    'café', 'naïve', '“quoted”', '—', 'U.S.', 'iPhone', 'India', 'Quora',
+    'Trump', 'USA', '$100', '2018', '10,000', '1990s', '5th', '(e.g.',
+    'etc.)', 'C++', 'e-mail', '&', '10%', 'x²', '€50']
+# Words which make insincere questions learnable
+INSINCERE_WORDS = [
+    'stupid', 'idiots', 'hate', 'liars', 'dumb', 'racist', 'fake', 'morons']
+SYLLABLES = [
+    c + v for c in ['b', 'c', 'd', 'f', 'g', 'h', 'k', 'l', 'm', 'n', 'p',
+                    'r', 's', 't', 'v', 'w', 'z', 'st', 'tr', 'ch', 'sh']
+    for v in ['a', 'e', 'i', 'o', 'u', 'ar', 'en', 'in', 'on', 'ly']]
+
+
+def build_word_pool(n_words, rng):
+    # Pseudo-words of 1-4 syllables, drawn from a Zipf distribution below
+    words = set()
+    while len(words) < n_words:
+        n = rng.randint(1, 5, n_words)
+        ids = rng.randint(len(SYLLABLES), size=(n_words, 4))
+        words.update(''.join(SYLLABLES[j] for j in row[:k])
+                     for row, k in zip(ids, n))
+    words = np.array(sorted(words), dtype=object)
+    rng.shuffle(words)
+    return words[:n_words]
+
+
+def generate_questions(n, targets=None, seed=0, n_words=50000,
+                       mean_length=13, zipf=1.2):
+    # Questions mimic the Quora data: a capitalized question word, mostly
+    # function words and a long tail of content words, a question mark
+    rng = np.random.RandomState(seed)
+    pool = build_word_pool(n_words, rng)
+    lengths = np.clip(rng.poisson(mean_length, n), 2, 120)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    n_tokens = offsets[-1]
+
+    kind = rng.choice(3, n_tokens, p=[0.45, 0.5, 0.05])
+    function_words = rng.randint(len(FUNCTION_WORDS), size=n_tokens)
+    content_words = (rng.zipf(zipf, n_tokens) - 1) % n_words
+    special_words = rng.randint(len(SPECIAL_WORDS), size=n_tokens)
+    capitalize = rng.rand(n_tokens) < 0.05
+    tokens = np.empty(n_tokens, dtype=object)
+    tokens[kind == 0] = np.array(FUNCTION_WORDS, object)[
+        function_words[kind == 0]]
+    tokens[kind == 1] = pool[content_words[kind == 1]]
+    tokens[kind == 2] = np.array(SPECIAL_WORDS, object)[
+        special_words[kind == 2]]
+    tokens[capitalize] = [w.capitalize() for w in tokens[capitalize]]
+    tokens[offsets[:-1]] = np.array(STARTERS, object)[
+        rng.randint(len(STARTERS), size=n)]
+    if targets is not None:
+        # One marker word in every insincere question
+        positions = offsets[:-1] + 1 + (rng.rand(n) * (lengths - 1)).astype(
+            int)
+        positives = np.asarray(targets) == 1
+        tokens[positions[positives]] = np.array(INSINCERE_WORDS, object)[
+            rng.randint(len(INSINCERE_WORDS), size=positives.sum())]
+
+    comma = rng.rand(n) < 0.2
+    questions = np.empty(n, dtype=object)
+    for i in range(n):
+        words = tokens[offsets[i]:offsets[i + 1]]
+        if comma[i] and len(words) > 4:
+            words = words.copy()
+            words[len(words) // 2] += ','
+        questions[i] = ' '.join(words) + '?'
+    return questions
+
+
+def generate_dataframes(n_train, n_test=None, seed=0, positive_rate=0.062):
+    # Same schema as train.csv and test.csv of the competition
+    n_test = n_train // 25 if n_test is None else n_test
+    rng = np.random.RandomState(seed)
+    targets = (rng.rand(n_train) < positive_rate).astype(int)
+    qids = [f'{i:020x}' for i in rng.randint(2 ** 62, size=n_train + n_test,
+                                             dtype=np.int64)]
+    train_df = pd.DataFrame(dict(
+        qid=qids[:n_train],
+        question_text=generate_questions(n_train, targets, seed=seed + 1),
+        target=targets,
+    ))
+    test_df = pd.DataFrame(dict(
+        qid=qids[n_train:],
+        question_text=generate_questions(n_test, seed=seed + 2),
+    ))
+    return train_df, test_df
+
+
+class SyntheticData(object):
+    # Inputs of the benchmarks, built on first use and shared
+
+    def __init__(self, n_questions=20000, seed=0, maxlen=72,
+                 embedding_dim=300):
+        self.n_questions = n_questions
+        self.seed = seed
+        self.maxlen = maxlen
+        self.embedding_dim = embedding_dim
+
+    @cached_property
+    def targets(self):
+        rng = np.random.RandomState(self.seed)
+        return (rng.rand(self.n_questions) < 0.062).astype(int)
+
+    @cached_property
+    def questions(self):
+        return generate_questions(self.n_questions, self.targets, self.seed)
+
+    @cached_property
+    def normalized(self):
+        normalizers = [NORMALIZER_REGISTRY[k] for k in [
+            'lower', 'misspell', 'punct', 'number+underscore']]
+        normalized = []
+        for x in self.questions:
+            for normalizer in normalizers:
+                x = normalizer(x)
+            normalized.append(x)
+        return np.array(normalized, dtype=object)
+
+    @cached_property
+    def tokens(self):
+        tokenize = TOKENIZER_REGISTRY['space']
+        tokens = np.empty(len(self.normalized), dtype=object)
+        tokens[:] = [tokenize(x) for x in self.normalized]
+        return tokens
+
+    @cached_property
+    def vocab(self):
+        vocab = WordVocab(mincount=5)
+        positives = self.targets == 1
+        vocab.add_documents(self.tokens[positives], 'train-pos')
+        vocab.add_documents(self.tokens[~positives], 'train-neg')
+        vocab.build()
+        return vocab
+
+    @cached_property
+    def pretrained_vectors(self):
+        # Random vectors with unknown words as zero rows
+        rng = np.random.RandomState(self.seed)
+        vectors = rng.normal(
+            0, 0.3, (len(self.vocab), self.embedding_dim)).astype('f')
+        unk = rng.rand(len(self.vocab)) < 0.2
+        unk[0] = True
+        vectors[unk] = 0
+        self.vocab.unk = unk
+        self.vocab.known = ~unk
+        return vectors
@@ -0,0 +1,87 @@
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+import pandas as pd
+
+
+async def request(reader, writer, method, path, body=None):
+    payload = b'' if body is None else json.dumps(body).encode()
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: localhost\r\n'
+        f'Content-Type: application/json\r\n'
+        f'Content-Length: {len(payload)}\r\n\r\n'.encode() + payload)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        k, v = line.decode('latin-1').split(':', 1)
+        headers[k.strip().lower()] = v.strip()
+    body = await reader.readexactly(int(headers['content-length']))
+    return status, json.loads(body)
+
+
+async def worker(config, questions, latencies):
+    reader, writer = await asyncio.open_connection(config.host, config.port)
+    try:
+        while len(questions) > 0:
+            batch = [questions.pop() for _ in range(
+                min(config.questions_per_request, len(questions)))]
+            start = time.perf_counter()
+            status, response = await request(
+                reader, writer, 'POST', '/predict', dict(questions=batch))
+            assert status == 200, response
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def run(config, questions):
+    questions = list(questions)
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        worker(config, questions, latencies)
+        for _ in range(config.concurrency)])
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(config.host, config.port)
+    status, metrics = await request(reader, writer, 'GET', '/metrics')
+    writer.close()
+
+    latencies = np.array(latencies) * 1000
+    return dict(
+        n_requests=len(latencies),
+        n_questions=config.n_questions,
+        elapsed_time=elapsed,
+        questions_per_sec=config.n_questions / elapsed,
+        latency_ms_p50=np.percentile(latencies, 50),
+        latency_ms_p95=np.percentile(latencies, 95),
+        latency_ms_p99=np.percentile(latencies, 99),
+        server_metrics=metrics,
+    )
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--csv', type=str, required=True)
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--n-questions', type=int, default=2000)
+    parser.add_argument('--questions-per-request', type=int, default=1)
+    config = parser.parse_args(args)
+
+    questions = pd.read_csv(config.csv).question_text.values
+    questions = np.resize(questions, config.n_questions).tolist()
+    result = asyncio.run(run(config, questions))
+    print(json.dumps(result, indent=2, default=float))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,42 @@
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from qiqc.serving import ModelBundle
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bundle', '-b', type=Path, required=True)
+    parser.add_argument('--input', '-i', type=Path, required=True)
+    parser.add_argument('--output', '-o', type=Path,
+                        default=Path('submission.csv'))
+    parser.add_argument('--backend', type=str, default='eager',
+                        choices=['eager', 'torchscript'])
+    parser.add_argument('--device', '-g', type=int)
+    parser.add_argument('--chunksize', type=int, default=10000)
+    parser.add_argument('--proba', action='store_true')
+    config = parser.parse_args(args)
+
+    bundle = ModelBundle.load(config.bundle, config.backend, config.device)
+    df = pd.read_csv(config.input)
+    texts = df.question_text.values
+    ys = [bundle.predict_proba(list(texts[i:i + config.chunksize]))
+          for i in tqdm(range(0, len(texts), config.chunksize),
+                        desc='predict')]
+    y = np.concatenate(ys) if len(ys) > 0 else np.zeros(0, 'f')
+
+    df['prediction'] = (y > bundle.threshold).astype('i')
+    columns = ['qid', 'prediction']
+    if config.proba:
+        df['probability'] = y
+        columns.append('probability')
+    config.output.parent.mkdir(parents=True, exist_ok=True)
+    df[columns].to_csv(config.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
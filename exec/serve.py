@@ -0,0 +1,24 @@
+import argparse
+import asyncio
+from pathlib import Path
+
+from qiqc.serving import ModelBundle, PredictionServer
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--bundle', '-b', type=Path, required=True)
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=5.)
+    config = parser.parse_args(args)
+
+    bundle = ModelBundle.load(config.bundle)
+    server = PredictionServer(
+        bundle, config.max_batch_size, config.max_wait_ms / 1000)
+    asyncio.run(server.serve(config.host, config.port))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,20 +1,25 @@
 import argparse
+import contextlib
 import time
-from copy import deepcopy
+from copy import copy
 from pathlib import Path
 
 import numpy as np
 import pandas as pd
 import sklearn
 import torch
-from torch.utils.data import DataLoader
 from tqdm import tqdm
 
 import qiqc
-from qiqc.datasets import load_qiqc, build_datasets
+from qiqc import tracing
+from qiqc.datasets import load_qiqc, build_datasets, BatchIterator
 from qiqc.preprocessing.modules import load_pretrained_vectors
 from qiqc.training import classification_metrics, ClassificationResult
-from qiqc.utils import set_seed, load_module
+from qiqc.training import compare_inference, distill
+from qiqc.training import distributed
+from qiqc.training import Checkpointer, EarlyStopping, SnapshotStore
+from qiqc.training.checkpoint import get_rng_state, set_rng_state
+from qiqc.utils import set_seed, load_module, autocast
 
 
 def main(args=None):
@@ -24,7 +29,10 @@ def main(args=None):
 
     modules = load_module(_args.modelfile)
     config = modules.ExperimentConfigBuilder().build(args=args)
-    qiqc.utils.rmtree_after_confirmation(config.outdir, config.test)
+    distributed.init_distributed(config.dist_backend)
+    if distributed.is_main_process() and not config.resume:
+        qiqc.utils.rmtree_after_confirmation(config.outdir, config.test)
+    distributed.barrier()
     train(config, modules)
 
 
@@ -33,143 +41,104 @@ def train(config, modules):
     start = time.time()
     set_seed(config.seed)
     config.outdir.mkdir(parents=True, exist_ok=True)
+    # Stages, folds, epochs and predictions record wall and CPU time and
+    # RSS at their boundaries, along with sizes of the large objects alive
+    tracer = tracing.Tracer()
+    tracing.set_tracer(tracer)
 
     build_model = modules.build_model
     Preprocessor = modules.Preprocessor
-    TextNormalizer = modules.TextNormalizer
-    TextTokenizer = modules.TextTokenizer
     WordEmbeddingFeaturizer = modules.WordEmbeddingFeaturizer
-    WordExtraFeaturizer = modules.WordExtraFeaturizer
     SentenceExtraFeaturizer = modules.SentenceExtraFeaturizer
     Ensembler = modules.Ensembler
 
-    train_df, submit_df = load_qiqc(n_rows=config.n_rows)
-    datasets = build_datasets(train_df, submit_df, config.holdout, config.seed)
-    train_dataset, test_dataset, submit_dataset = datasets
-
-    print('Tokenize texts...')
-    preprocessor = Preprocessor()
-    normalizer = TextNormalizer(config)
-    tokenizer = TextTokenizer(config)
-    train_dataset.tokens, test_dataset.tokens, submit_dataset.tokens = \
-        preprocessor.tokenize(datasets, normalizer, tokenizer)
-
-    print('Build vocabulary...')
-    vocab = preprocessor.build_vocab(datasets, config)
+    # The global batch is split equally over data-parallel ranks
+    world_size = distributed.get_world_size()
+    assert config.batchsize % world_size == 0, \
+        f'--batchsize {config.batchsize} is not divisible by {world_size} ' \
+        f'processes'
 
-    print('Build token ids...')
-    train_dataset.tids, test_dataset.tids, submit_dataset.tids = \
-        preprocessor.build_tokenids(datasets, vocab, config)
-
-    print('Build sentence extra features...')
+    is_main = distributed.is_main_process()
+    checkpointer = Checkpointer(config.outdir / 'checkpoint', enabled=is_main)
+    artifacts = load_artifacts(config, modules, checkpointer)
+    datasets = artifacts['datasets']
+    train_dataset, test_dataset, submit_dataset = datasets
+    vocab = artifacts['vocab']
+    embedding_matrices = artifacts['embedding_matrices']
+    word_extra_features = artifacts['word_extra_features']
     sentence_extra_featurizer = SentenceExtraFeaturizer(config)
-    train_dataset._X2, test_dataset._X2, submit_dataset._X2 = \
-        preprocessor.build_sentence_features(
-            datasets, sentence_extra_featurizer)
-    [d.build(config.device) for d in datasets]
-
-    print('Load pretrained vectors...')
-    pretrained_vectors = load_pretrained_vectors(
-        config.use_pretrained_vectors, vocab.token2id, test=config.test)
-
-    print('Build word embedding matrix...')
+    sentence_extra_featurizer.mean = artifacts['sentence_extra_mean']
+    sentence_extra_featurizer.std = artifacts['sentence_extra_std']
     word_embedding_featurizer = WordEmbeddingFeaturizer(config, vocab)
-    embedding_matrices = preprocessor.build_embedding_matrices(
-        datasets, word_embedding_featurizer, vocab, pretrained_vectors)
-
-    print('Build word extra features...')
-    word_extra_featurizer = WordExtraFeaturizer(config, vocab)
-    word_extra_features = word_extra_featurizer(vocab)
+    preprocessor = Preprocessor()
 
     print('Build models...')
-    word_features_cv = [
-        preprocessor.build_word_features(
-            word_embedding_featurizer, embedding_matrices, word_extra_features)
-        for i in range(config.cv)]
-
-    models = [
-        build_model(
-            config, word_features, sentence_extra_featurizer.n_dims
-        ) for word_features in word_features_cv]
+    with tracing.trace('build_models', n_items=config.cv):
+        word_features_cv = [
+            preprocessor.build_word_features(
+                word_embedding_featurizer, embedding_matrices,
+                word_extra_features)
+            for i in range(config.cv)]
+
+        models = [
+            build_model(
+                config, word_features, sentence_extra_featurizer.n_dims
+            ) for word_features in word_features_cv]
+        tracing.track('word_features_cv', word_features_cv)
+        tracing.track('models', models)
 
     print('Start training...')
     splitter = sklearn.model_selection.StratifiedKFold(
         n_splits=config.cv, shuffle=True, random_state=config.seed)
+    folds = list(splitter.split(train_dataset.df, train_dataset.df.target))
+    if config.cv_part is not None:
+        folds = folds[:config.cv_part]
+
+    # Completed folds are restored from checkpoints on resume
+    fold_results = {}
+    if config.resume:
+        for i_cv in range(len(folds)):
+            result = checkpointer.load_fold(i_cv, models[i_cv])
+            if result is not None:
+                if is_main:
+                    print(f'Load cv: {i_cv} / {config.cv}')
+                fold_results[i_cv] = result
+    pending_folds = [(i_cv, fold) for i_cv, fold in enumerate(folds)
+                     if i_cv not in fold_results]
+
+    if config.cv_workers > 1:
+        assert distributed.get_world_size() == 1, \
+            'Fold-parallel training does not run under data parallelism'
+        fold_results.update(train_folds_parallel(
+            config, models, train_dataset, pending_folds, checkpointer))
+    else:
+        for i_cv, fold in pending_folds:
+            with tracing.trace('fold', i_cv=i_cv):
+                fold_results[i_cv] = train_fold(
+                    config, i_cv, models[i_cv], train_dataset, *fold,
+                    checkpointer=checkpointer)
+    fold_results = [fold_results[i_cv] for i_cv in sorted(fold_results)]
+
+    # Snapshots are identical on every data-parallel rank, so the rest of
+    # the pipeline runs on the main process only
+    if not distributed.is_main_process():
+        return None
+
     train_results, valid_results = [], []
     best_models = []
-
-    for i_cv, (train_indices, valid_indices) in enumerate(
-            splitter.split(train_dataset.df, train_dataset.df.target)):
-        if config.cv_part is not None and i_cv >= config.cv_part:
-            break
-        train_tensor = train_dataset.build_labeled_dataset(train_indices)
-        valid_tensor = train_dataset.build_labeled_dataset(valid_indices)
-        valid_iter = DataLoader(
-            valid_tensor, batch_size=config.batchsize_valid)
-
-        model = models.pop(0)
-        model = model.to_device(config.device)
-        model_snapshots = []
-        optimizer = torch.optim.Adam(model.parameters(), config.lr)
-        train_result = ClassificationResult('train', config.outdir, str(i_cv))
-        valid_result = ClassificationResult('valid', config.outdir, str(i_cv))
-
-        batchsize = config.batchsize
-        for epoch in range(config.epochs):
-            if epoch in config.scale_batchsize:
-                batchsize *= 2
-                print(f'Batchsize: {batchsize}')
-            epoch_start = time.time()
-            sampler = None
-            train_iter = DataLoader(
-                train_tensor, sampler=sampler, drop_last=True,
-                batch_size=batchsize, shuffle=sampler is None)
-            _summary = []
-
-            # Training loop
-            for i, batch in enumerate(
-                    tqdm(train_iter, desc='train', leave=False)):
-                model.train()
-                optimizer.zero_grad()
-                loss, output = model.calc_loss(*batch)
-                loss.backward()
-                optimizer.step()
-                train_result.add_record(**output)
-            train_result.calc_score(epoch)
-            _summary.append(train_result.summary.iloc[-1])
-
-            # Validation loop
-            if epoch >= config.validate_from:
-                for i, batch in enumerate(
-                        tqdm(valid_iter, desc='valid', leave=False)):
-                    model.eval()
-                    loss, output = model.calc_loss(*batch)
-                    valid_result.add_record(**output)
-                valid_result.calc_score(epoch)
-                _summary.append(valid_result.summary.iloc[-1])
-
-                _model = deepcopy(model)
-                _model.threshold = valid_result.summary.threshold[epoch]
-                model_snapshots.append(_model)
-
-            summary = pd.DataFrame(_summary).set_index('name')
-            epoch_time = time.time() - epoch_start
-            pbar = '#' * (i_cv + 1) + '-' * (config.cv - 1 - i_cv)
-            tqdm.write(f'\n{pbar} cv: {i_cv} / {config.cv}, epoch {epoch}, '
-                       f'time: {epoch_time}')
-            tqdm.write(str(summary))
-
+    for train_result, valid_result, snapshots in fold_results:
         train_results.append(train_result)
         valid_results.append(valid_result)
-        best_indices = valid_result.summary.fbeta.argsort()[::-1]
-        best_models.extend([model_snapshots[i] for i in
-                            best_indices[:config.ensembler_n_snapshots]])
+        best_models.extend(snapshots)
+    tracing.track('best_models', best_models)
 
     # Build ensembler
     train_X, train_X2, train_t = \
         train_dataset.X, train_dataset.X2, train_dataset.t
     ensembler = Ensembler(config, best_models, valid_results)
-    ensembler.fit(train_X, train_X2, train_t)
+    with tracing.trace('ensembler_fit', n_items=len(train_X)):
+        ensembler.fit(train_X, train_X2, train_t)
+        tracing.track('ensembler', ensembler)
     scores = dict(
         valid_fbeta=np.array([r.best_fbeta for r in valid_results]).mean(),
         valid_epoch=np.array([r.best_epoch for r in valid_results]).mean(),
@@ -181,7 +150,8 @@ def train(config, modules):
     if config.holdout:
         test_X, test_X2, test_t = \
             test_dataset.X, test_dataset.X2, test_dataset._t
-        y, t = ensembler.predict_proba(test_X, test_X2), test_t
+        with tracing.trace('predict_holdout', n_items=len(test_X)):
+            y, t = ensembler.predict_proba(test_X, test_X2), test_t
         y_pred = y > ensembler.threshold
         y_pred_cv = y > ensembler.threshold_cv
         result = classification_metrics(y_pred, t)
@@ -194,16 +164,461 @@ def train(config, modules):
             test_threshold_theoretical=result_theoretical['threshold'],
         ))
 
+    # Inference modes are compared on holdout data if available, otherwise
+    # on train data
+    if config.holdout:
+        eval_X, eval_X2, eval_t = test_X, test_X2, test_t
+    else:
+        eval_X, eval_X2, eval_t = train_X, train_X2, train_dataset._t
+
+    if config.precision != 'fp32':
+        print(f'Compare {config.precision} inference with fp32...')
+        reference = copy(ensembler)
+        reference.precision = 'fp32'
+        with tracing.trace('compare_precision'):
+            report = compare_inference(
+                reference, ensembler, eval_X, eval_X2, eval_t,
+                ensembler.threshold)
+        scores.update(
+            {f'{config.precision}_{k}': v for k, v in report.items()})
+
+    if config.distill:
+        print('Distill ensembler into a student model...')
+        with tracing.trace('distill'):
+            student = distill(
+                config, build_model, ensembler, word_features_cv[0],
+                sentence_extra_featurizer.n_dims, train_X, train_X2, train_t,
+                submit_dataset.X, submit_dataset.X2)
+            report = compare_inference(
+                ensembler, student, eval_X, eval_X2, eval_t,
+                ensembler.threshold, student.threshold)
+        # Without holdout data the student is scored on the rows it was
+        # distilled on, which favors it over the teacher
+        report['in_sample'] = not config.holdout
+        if report['in_sample']:
+            print('Student is compared on its training data (in-sample), '
+                  'use --holdout for an unbiased comparison')
+        scores.update({f'distill_{k}': v for k, v in report.items()})
+        torch.save(dict(
+            state_dict=student.models[0].state_dict(),
+            threshold=student.threshold,
+        ), config.outdir / 'student.pt')
+
+    # Bundles keep float weights, which are quantized again on load
+    bundle_models = ensembler.models
+
+    if config.quantize:
+        print('Quantize ensembler...')
+        with tracing.trace('quantize'):
+            quantized = qiqc.modules.quantize_ensembler(ensembler)
+            report = compare_inference(
+                ensembler, quantized, eval_X, eval_X2, eval_t,
+                ensembler.threshold)
+        scores.update({f'quantize_{k}': v for k, v in report.items()})
+        ensembler = quantized
+
     print(scores)
 
     # Predict submit datasets
-    submit_y = ensembler.predict(submit_dataset.X, submit_dataset.X2)
+    with tracing.trace('predict_submit', n_items=len(submit_dataset.X)):
+        submit_y = ensembler.predict(submit_dataset.X, submit_dataset.X2)
+    submit_df = submit_dataset.df
     submit_df['prediction'] = submit_y
     submit_df = submit_df[['qid', 'prediction']]
     submit_df.to_csv(config.outdir / 'submission.csv', index=False)
 
+    if config.export_torchscript:
+        print('Export TorchScript modules...')
+        with tracing.trace('export_torchscript'):
+            qiqc.modules.export_ensembler(
+                ensembler, train_X, train_X2, config.outdir / 'torchscript')
+
+    if config.save_bundle:
+        print('Save model bundle...')
+        with tracing.trace('save_bundle'):
+            qiqc.serving.save_bundle(
+                config.outdir / 'bundle', config, vocab,
+                sentence_extra_featurizer, bundle_models, ensembler,
+                train_X, train_X2)
+
+    tracer.save(config.outdir)
+    summary = pd.DataFrame(tracer.summary()).set_index('name')
+    print(summary[['count', 'wall', 'cpu', 'items_per_sec']])
+    report = tracer.memory_report()
+    print(f'Peak RSS: {report["peak_rss"] / 2 ** 20:.1f} MiB '
+          f'at {report["peak_stage"]}')
+    consumers = pd.DataFrame(report['top_consumers']).set_index('name')
+    consumers['mib'] = consumers.nbytes / 2 ** 20
+    consumers['path'] = consumers.path.fillna('')
+    print(consumers[['mib', 'path']])
     return scores
 
 
+def load_artifacts(config, modules, checkpointer):
+    # Only the main process preprocesses (or loads the checkpoint), and
+    # sends the artifacts to the other ranks along with its RNG state
+    is_main = distributed.is_main_process()
+    artifacts = None
+    if is_main and config.resume:
+        with tracing.trace('load_preprocessing'):
+            artifacts = checkpointer.load_preprocessing()
+        if artifacts is not None:
+            print('Load preprocessing artifacts...')
+    if is_main and artifacts is None:
+        with tracing.trace('preprocess'):
+            artifacts = preprocess(config, modules)
+            checkpointer.save_preprocessing(artifacts)
+    if distributed.get_world_size() > 1:
+        with tracing.trace('broadcast_preprocessing'):
+            rng_state, artifacts = distributed.broadcast_object(
+                (get_rng_state(), artifacts) if is_main else None)
+            set_rng_state(rng_state)
+    return artifacts
+
+
+def preprocess(config, modules):
+    Preprocessor = modules.Preprocessor
+    TextNormalizer = modules.TextNormalizer
+    TextTokenizer = modules.TextTokenizer
+    WordEmbeddingFeaturizer = modules.WordEmbeddingFeaturizer
+    WordExtraFeaturizer = modules.WordExtraFeaturizer
+    SentenceExtraFeaturizer = modules.SentenceExtraFeaturizer
+
+    with tracing.trace('load_data') as span:
+        train_df, submit_df = load_qiqc(n_rows=config.n_rows)
+        datasets = build_datasets(
+            train_df, submit_df, config.holdout, config.seed)
+        span['n_items'] = len(train_df) + len(submit_df)
+    train_dataset, test_dataset, submit_dataset = datasets
+    n_texts = sum(len(d.df) for d in datasets)
+
+    print('Tokenize texts...')
+    preprocessor = Preprocessor()
+    normalizer = TextNormalizer(config)
+    tokenizer = TextTokenizer(config)
+    with tracing.trace('tokenize', n_items=n_texts):
+        train_dataset.tokens, test_dataset.tokens, submit_dataset.tokens = \
+            preprocessor.tokenize(datasets, normalizer, tokenizer)
+        tracing.track("df['question_text']",
+                      [d.df.question_text for d in datasets])
+        tracing.track("df['tokens']", [d.df.tokens for d in datasets])
+
+    print('Build vocabulary...')
+    with tracing.trace('build_vocab', n_items=n_texts):
+        vocab = preprocessor.build_vocab(datasets, config)
+        tracing.track('vocab', vocab)
+
+    print('Build token ids...')
+    with tracing.trace('build_tokenids', n_items=n_texts):
+        train_dataset.tids, test_dataset.tids, submit_dataset.tids = \
+            preprocessor.build_tokenids(datasets, vocab, config)
+        tracing.track('tids', [d.tids for d in datasets])
+
+    print('Build sentence extra features...')
+    sentence_extra_featurizer = SentenceExtraFeaturizer(config)
+    with tracing.trace('build_sentence_features', n_items=n_texts):
+        train_dataset._X2, test_dataset._X2, submit_dataset._X2 = \
+            preprocessor.build_sentence_features(
+                datasets, sentence_extra_featurizer)
+        [d.build(config.device) for d in datasets]
+        tracing.track('X', [d.X for d in datasets])
+        tracing.track('X2', [(d._X2, d.X2) for d in datasets])
+
+    n_words = len(vocab.token2id)
+    print('Load pretrained vectors...')
+    with tracing.trace('load_pretrained_vectors', n_items=n_words):
+        pretrained_vectors = load_pretrained_vectors(
+            config.use_pretrained_vectors, vocab.token2id, test=config.test)
+        tracing.track('pretrained_vectors', pretrained_vectors)
+
+    print('Build word embedding matrix...')
+    word_embedding_featurizer = WordEmbeddingFeaturizer(config, vocab)
+    with tracing.trace('build_embedding_matrices', n_items=n_words):
+        embedding_matrices = preprocessor.build_embedding_matrices(
+            datasets, word_embedding_featurizer, vocab, pretrained_vectors)
+        tracing.track('embedding_matrices', embedding_matrices)
+
+    print('Build word extra features...')
+    word_extra_featurizer = WordExtraFeaturizer(config, vocab)
+    with tracing.trace('build_word_extra_features', n_items=n_words):
+        word_extra_features = word_extra_featurizer(vocab)
+        tracing.track('word_extra_features', word_extra_features)
+
+    return dict(
+        datasets=datasets,
+        vocab=vocab,
+        embedding_matrices=embedding_matrices,
+        word_extra_features=word_extra_features,
+        sentence_extra_mean=sentence_extra_featurizer.mean,
+        sentence_extra_std=sentence_extra_featurizer.std,
+    )
+
+
+def train_fold(config, i_cv, model, train_dataset, train_indices,
+               valid_indices, checkpointer=None):
+    rank = distributed.get_rank()
+    world_size = distributed.get_world_size()
+    is_main = distributed.is_main_process()
+    train_tensor = train_dataset.build_labeled_dataset(train_indices)
+    valid_tensor = train_dataset.build_labeled_dataset(valid_indices)
+    valid_iter = BatchIterator(
+        valid_tensor, batch_size=config.batchsize_valid,
+        num_replicas=world_size, rank=rank)
+
+    model = model.to_device(config.device)
+    # Only trainable weights of each validated epoch are spilled to disk,
+    # and the best ones are re-materialized at the end of the fold
+    model_snapshots = SnapshotStore(
+        config.outdir / 'snapshots' / f'fold{i_cv}' if is_main else None)
+    optimizer = torch.optim.Adam(model.parameters(), config.lr)
+    # Gradients are averaged over ranks, each of which takes an equal part
+    # of the global batch
+    train_model = model
+    if world_size > 1:
+        assert config.device is None, 'Data-parallel training runs on CPU'
+        train_model = distributed.DistributedClassifier(model)
+    train_result = ClassificationResult(
+        'train', config.outdir, str(i_cv),
+        mode=config.metrics_mode, n_bins=config.metrics_n_bins)
+    valid_result = ClassificationResult(
+        'valid', config.outdir, str(i_cv),
+        mode=config.metrics_mode, n_bins=config.metrics_n_bins)
+    train_result.reserve(len(train_indices))
+    valid_result.reserve(len(valid_indices))
+
+    # Early epochs are validated on a stratified subsample of the valid
+    # split, and the full split is only evaluated near the best epoch
+    early_stopping = EarlyStopping(
+        config.early_stopping_patience, config.early_stopping_min_delta)
+    subsample_iter, subsample_result = None, None
+    if config.validate_subsample_ratio is not None:
+        subsample_indices = split_subsample(
+            config, valid_indices, train_dataset.df.target.values)
+        subsample_iter = BatchIterator(
+            train_dataset.build_labeled_dataset(subsample_indices),
+            batch_size=config.batchsize_valid,
+            num_replicas=world_size, rank=rank)
+        subsample_result = ClassificationResult(
+            'valid_subsample', config.outdir, str(i_cv),
+            mode=config.metrics_mode, n_bins=config.metrics_n_bins)
+        subsample_result.reserve(len(subsample_indices))
+
+    sampler = None
+    train_iter = BatchIterator(
+        train_tensor, sampler=sampler, drop_last=True,
+        batch_size=config.batchsize // world_size, shuffle=sampler is None,
+        num_replicas=world_size, rank=rank, seed=config.seed + i_cv)
+
+    # Pick up from the last completed epoch of an interrupted fold
+    start_epoch = 0
+    state = None
+    if config.resume and checkpointer is not None:
+        state = checkpointer.load_epoch(i_cv, model, optimizer)
+    if state is not None:
+        start_epoch = state['epoch'] + 1
+        train_result = state['train_result']
+        valid_result = state['valid_result']
+        subsample_result = state['subsample_result']
+        early_stopping = state['early_stopping']
+        model_snapshots.load_state_dict(state['snapshots'])
+        train_iter.batch_size = state['batch_size']
+        if is_main:
+            print(f'Resume cv: {i_cv} / {config.cv} from epoch {start_epoch}')
+    # A fold interrupted right after early stopping has no epochs left
+    if early_stopping.should_stop:
+        start_epoch = config.epochs
+
+    for epoch in range(start_epoch, config.epochs):
+        train_iter.set_epoch(epoch)
+        if epoch in config.scale_batchsize:
+            train_iter.batch_size *= 2
+            if is_main:
+                print(f'Batchsize: {train_iter.batch_size * world_size}')
+        epoch_start = time.time()
+        _summary = []
+
+        # Training loop
+        with tracing.trace('train', n_items=0, epoch=epoch) as span:
+            for i, batch in enumerate(tqdm(
+                    train_iter, desc='train', leave=False,
+                    disable=not is_main)):
+                train_model.train()
+                optimizer.zero_grad()
+                with autocast(config.precision, config.device):
+                    loss, output = train_model.calc_loss(*batch)
+                loss.backward()
+                optimizer.step()
+                train_result.add_record(**output)
+                span['n_items'] += len(batch[0])
+            if world_size > 1:
+                distributed.broadcast_buffers(model)
+            train_result.calc_score(epoch)
+        _summary.append(train_result.summary.iloc[-1])
+
+        # Validation loop
+        if epoch >= config.validate_from:
+            validate_full = True
+            if subsample_iter is not None:
+                row = validate(
+                    config, model, subsample_iter, subsample_result, epoch)
+                _summary.append(row)
+                score = row[subsample_result.main_metrics]
+                validate_full = early_stopping.is_near_best(
+                    score, config.validate_subsample_margin)
+
+            if validate_full:
+                row = validate(config, model, valid_iter, valid_result, epoch)
+                _summary.append(row)
+                if subsample_iter is None:
+                    score = row[valid_result.main_metrics]
+                # Only the main process builds the ensemble
+                if is_main:
+                    model_snapshots.add(
+                        model, f'epoch{epoch}',
+                        threshold=valid_result.summary.threshold[epoch])
+            early_stopping.update(score, epoch)
+
+        if checkpointer is not None:
+            with tracing.trace('checkpoint', epoch=epoch):
+                checkpointer.save_epoch(
+                    i_cv, epoch, model, optimizer,
+                    train_result=train_result,
+                    valid_result=valid_result,
+                    subsample_result=subsample_result,
+                    early_stopping=early_stopping,
+                    snapshots=model_snapshots.state_dict(),
+                    batch_size=train_iter.batch_size)
+
+        if is_main:
+            summary = pd.DataFrame(_summary).set_index('name')
+            epoch_time = time.time() - epoch_start
+            pbar = '#' * (i_cv + 1) + '-' * (config.cv - 1 - i_cv)
+            tqdm.write(f'\n{pbar} cv: {i_cv} / {config.cv}, epoch {epoch}, '
+                       f'time: {epoch_time}')
+            tqdm.write(str(summary))
+        if early_stopping.should_stop:
+            if is_main:
+                tqdm.write(f'Early stopping at epoch {epoch}, best epoch: '
+                           f'{early_stopping.best_epoch}')
+            break
+
+    tracing.track('model_snapshots', model_snapshots)
+    best_indices = valid_result.summary.fbeta.argsort()[::-1]
+    best_models = []
+    if is_main:
+        with tracing.trace('materialize_snapshots'):
+            best_models = model_snapshots.materialize(
+                model, best_indices[:config.ensembler_n_snapshots])
+    # Ensemblers that work per fold need to know where snapshots come from
+    for _model in best_models:
+        _model.i_cv = i_cv
+    valid_result.indices = valid_indices
+    if checkpointer is not None:
+        checkpointer.save_fold(i_cv, train_result, valid_result, best_models)
+    # Resuming a finished fold only needs its fold checkpoint
+    if not config.keep_snapshots:
+        model_snapshots.clear()
+        if is_main:
+            # Left to the last fold when folds run in parallel
+            with contextlib.suppress(OSError):
+                (config.outdir / 'snapshots').rmdir()
+    return train_result, valid_result, best_models
+
+
+def split_subsample(config, valid_indices, targets):
+    # Stratified unless a class has too few rows to be split, as in small
+    # or very imbalanced valid splits. Then one row of each class is kept,
+    # so that scores are defined, and the others are sampled.
+    targets = targets[valid_indices]
+    kwargs = dict(
+        train_size=config.validate_subsample_ratio, random_state=config.seed)
+    try:
+        subsample_indices, _ = sklearn.model_selection.train_test_split(
+            valid_indices, stratify=targets, **kwargs)
+    except ValueError:
+        first = np.unique(targets, return_index=True)[1]
+        subsample_indices, _ = sklearn.model_selection.train_test_split(
+            np.delete(valid_indices, first), **kwargs)
+        subsample_indices = np.concatenate(
+            [valid_indices[first], subsample_indices])
+    return subsample_indices
+
+
+def validate(config, model, valid_iter, valid_result, epoch):
+    with tracing.trace(valid_result.name, n_items=0, epoch=epoch) as span:
+        for i, batch in enumerate(tqdm(
+                valid_iter, desc=valid_result.name, leave=False,
+                disable=not distributed.is_main_process())):
+            model.eval()
+            with autocast(config.precision, config.device):
+                loss, output = model.calc_loss(*batch)
+            valid_result.add_record(**output)
+            span['n_items'] += len(batch[0])
+        valid_result.calc_score(epoch)
+    return valid_result.summary.iloc[-1]
+
+
+# Per-process state of fold workers, inherited from the parent by fork
+_fold_worker = {}
+
+
+def _init_fold_worker(config, models, train_dataset, checkpointer,
+                      n_threads):
+    torch.set_num_threads(n_threads)
+    _fold_worker.update(
+        config=config, models=models, train_dataset=train_dataset,
+        checkpointer=checkpointer)
+
+
+def _train_fold_worker(args):
+    i_cv, (train_indices, valid_indices) = args
+    config = _fold_worker['config']
+    # Folds do not run in order, so each one gets its own seed instead of
+    # the RNG state a serial run would reach. Results with the same seed
+    # therefore differ from serial training.
+    set_seed(config.seed + i_cv)
+    # Spans and tracked objects of the worker are sent back along with the
+    # fold results
+    tracer = tracing.get_tracer()
+    n_spans, n_allocations = len(tracer.spans), len(tracer.allocations)
+    with tracing.trace('fold', i_cv=i_cv):
+        result = train_fold(
+            config, i_cv, _fold_worker['models'][i_cv],
+            _fold_worker['train_dataset'], train_indices, valid_indices,
+            checkpointer=_fold_worker['checkpointer'])
+    return (i_cv, result, tracer.spans[n_spans:],
+            tracer.allocations[n_allocations:])
+
+
+def train_folds_parallel(config, models, train_dataset, folds,
+                         checkpointer=None):
+    # Workers are forked so that the preprocessed dataset and the frozen
+    # embeddings are shared instead of pickled, and each of them gets an
+    # equal part of the intra-op threads
+    assert config.device is None, 'Fold-parallel training runs on CPU'
+    if len(folds) == 0:
+        return {}
+    for tensor in (train_dataset.X, train_dataset.X2,
+                   train_dataset.t, train_dataset.W):
+        tensor.share_memory_()
+    for model in models:
+        model.share_memory()
+    n_workers = min(config.cv_workers, len(folds))
+    n_threads = max(torch.get_num_threads() // n_workers, 1)
+
+    context = torch.multiprocessing.get_context('fork')
+    fold_results = {}
+    with context.Pool(
+            n_workers, initializer=_init_fold_worker,
+            initargs=(config, models, train_dataset, checkpointer,
+                      n_threads)) as pool:
+        for i_cv, result, spans, allocations in pool.imap_unordered(
+                _train_fold_worker, folds):
+            print(f'Finished cv: {i_cv} / {config.cv}')
+            fold_results[i_cv] = result
+            tracing.get_tracer().extend(spans, allocations)
+    return fold_results
+
+
 if __name__ == '__main__':
     main()
@@ -47,8 +47,8 @@ class ExperimentConfigBuilder(ExperimentConfigBuilderBase):
 def build_model(config, embedding_matrix, n_sentence_extra_features):
     embedding = Embedding(config, embedding_matrix)
     encoder = Encoder(config, embedding.out_size)
-    aggregator = Aggregator(config)
-    mlp = MLP(config, encoder.out_size + n_sentence_extra_features)
+    aggregator = Aggregator(config, encoder.out_size)
+    mlp = MLP(config, aggregator.out_size + n_sentence_extra_features)
     out = nn.Linear(config.mlp_n_hiddens[-1], 1)
     lossfunc = nn.BCEWithLogitsLoss()
 
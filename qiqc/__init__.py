@@ -1,5 +1,5 @@
-import qiqc.datasets  # NOQA
-import qiqc.modules  # NOQA
-import qiqc.preprocessing  # NOQA
-import qiqc.training  # NOQA
-import qiqc.utils  # NOQA
+from qiqc.lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, submodules=[
+    'datasets', 'modules', 'preprocessing', 'serving', 'tracing', 'training',
+    'utils'])
@@ -23,6 +23,15 @@ class ExperimentConfigBuilderBase(metaclass=ABCMeta):
         parser.add_argument('--cv', type=int, default=5)
         parser.add_argument('--cv-part', type=int)
         parser.add_argument('--processes', type=int, default=2)
+        parser.add_argument(
+            '--cv-workers', type=int, default=1,
+            help='Folds trained in parallel processes. Each fold is seeded '
+                 'with seed + fold index, so models differ from a serial '
+                 'run with the same seed.')
+        # Data-parallel training runs on CPU
+        parser.add_argument('--dist-backend', type=str, default='gloo',
+                            choices=['gloo'])
+        parser.add_argument('--resume', action='store_true')
 
         parser.add_argument('--lr', type=float, default=1e-3)
         parser.add_argument('--batchsize', type=int, default=512)
@@ -31,10 +40,40 @@ class ExperimentConfigBuilderBase(metaclass=ABCMeta):
                             default=[])
         parser.add_argument('--epochs', type=int, default=5)
         parser.add_argument('--validate-from', type=int)
+        parser.add_argument('--validate-subsample-ratio', type=float)
+        parser.add_argument('--validate-subsample-margin', type=float,
+                            default=0.01)
+        parser.add_argument('--early-stopping-patience', type=int)
+        parser.add_argument('--early-stopping-min-delta', type=float,
+                            default=0.)
         parser.add_argument('--pos-weight', type=float, default=1.)
         parser.add_argument('--maxlen', type=float, default=72)
         parser.add_argument('--vocab-mincount', type=float, default=5)
         parser.add_argument('--ensembler-n-snapshots', type=int, default=1)
+        parser.add_argument('--ensembler-update-bn', action='store_true')
+        parser.add_argument(
+            '--keep-snapshots', action='store_true',
+            help='Keep the snapshot files spilled under <outdir>/snapshots '
+                 'once a fold is finished.')
+        parser.add_argument('--metrics-mode', type=str, default='exact',
+                            choices=['exact', 'histogram'])
+        parser.add_argument('--metrics-n-bins', type=int, default=10000)
+        parser.add_argument('--export-torchscript', action='store_true')
+        parser.add_argument('--save-bundle', action='store_true')
+        parser.add_argument('--quantize', action='store_true')
+        parser.add_argument('--distill', action='store_true')
+        parser.add_argument('--distill-epochs', type=int, default=3)
+        parser.add_argument('--distill-lr', type=float, default=1e-3)
+        parser.add_argument('--distill-alpha', type=float, default=0.)
+        parser.add_argument('--distill-encoder', type=str)
+        parser.add_argument('--distill-encoder-n-hidden', type=int)
+        parser.add_argument('--distill-encoder-n-layers', type=int)
+        parser.add_argument('--inference-mode', type=str,
+                            default='shared_embedding',
+                            choices=['shared_embedding', 'threaded'])
+        parser.add_argument('--inference-threads', type=int)
+        parser.add_argument('--precision', type=str, default='fp32',
+                            choices=['fp32', 'bf16'])
 
     @abstractmethod
     def modules(self):
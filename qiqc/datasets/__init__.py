@@ -1,3 +1,8 @@
-from qiqc.datasets.qiqc import load_qiqc  # NOQA
-from qiqc.datasets.qiqc import build_datasets  # NOQA
-from qiqc.datasets.qiqc import QIQCDataset  # NOQA
+from qiqc.lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'load_qiqc': '.qiqc',
+    'build_datasets': '.qiqc',
+    'QIQCDataset': '.qiqc',
+    'BatchIterator': '.iterator',
+})
@@ -0,0 +1,89 @@
+import math
+
+import torch
+from torch.utils.data import TensorDataset
+
+
+class BatchIterator(object):
+
+    def __init__(self, dataset, batch_size, shuffle=False, drop_last=False,
+                 sampler=None, num_replicas=1, rank=0, seed=0):
+        if isinstance(dataset, TensorDataset):
+            dataset = dataset.tensors
+        self.tensors = tuple(dataset)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.drop_last = drop_last
+        self.sampler = sampler
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    @property
+    def n_total_samples(self):
+        if self.sampler is not None:
+            return len(self.sampler)
+        return len(self.tensors[0])
+
+    @property
+    def n_samples(self):
+        n = self.n_total_samples
+        if self.num_replicas > 1:
+            if self.drop_last:
+                return n // self.num_replicas
+            return len(range(self.rank, n, self.num_replicas))
+        return n
+
+    def __len__(self):
+        if self.drop_last:
+            return self.n_samples // self.batch_size
+        return math.ceil(self.n_samples / self.batch_size)
+
+    def sample_indices(self):
+        n = self.n_total_samples
+        indices = None
+        if self.sampler is not None:
+            indices = torch.as_tensor(list(self.sampler), dtype=torch.long)
+        elif self.shuffle and self.num_replicas > 1:
+            # Every rank draws the same permutation for a given epoch
+            generator = torch.Generator()
+            generator.manual_seed(self.seed + self.epoch)
+            indices = torch.randperm(n, generator=generator)
+        elif self.shuffle:
+            # Same draws from the global RNG as RandomSampler, so that a
+            # seed gives the same order as a shuffling DataLoader
+            seed = int(torch.empty((), dtype=torch.int64).random_().item())
+            generator = torch.Generator()
+            generator.manual_seed(seed)
+            indices = torch.randperm(n, generator=generator)
+
+        if self.num_replicas > 1:
+            # Equal shards when dropping the last batch so that every rank
+            # runs the same number of steps
+            if indices is None:
+                indices = torch.arange(n)
+            if self.drop_last:
+                indices = indices[:n - n % self.num_replicas]
+            indices = indices[self.rank::self.num_replicas]
+        return indices
+
+    def __iter__(self):
+        # Draw the epoch order once and gather whole batches in one op. A
+        # DataLoader draws a base seed for its workers first, even without
+        # workers, which is kept for reproducibility with it.
+        torch.empty((), dtype=torch.int64).random_()
+        indices = self.sample_indices()
+        if indices is not None:
+            indices = indices.to(self.tensors[0].device)
+        for i in range(len(self)):
+            start = i * self.batch_size
+            end = start + self.batch_size
+            if indices is None:
+                yield [x[start:end] for x in self.tensors]
+            else:
+                batch_indices = indices[start:end]
+                yield [x.index_select(0, batch_indices) for x in self.tensors]
@@ -0,0 +1,27 @@
+import importlib
+import sys
+
+
+def lazy_exports(package, exports=None, submodules=()):
+    # Module __getattr__ (PEP 562) importing exported names from their
+    # (relative) module paths and submodules on first access, so importing
+    # a package does not pull in the dependencies of all of its modules
+    exports = dict(exports or {})
+    submodules = set(submodules)
+
+    def __getattr__(name):
+        if name in submodules:
+            return importlib.import_module(f'{package}.{name}')
+        if name not in exports:
+            raise AttributeError(
+                f'module {package!r} has no attribute {name!r}')
+        module = importlib.import_module(exports[name], package)
+        value = getattr(module, name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__():
+        return sorted(
+            set(vars(sys.modules[package])) | exports.keys() | submodules)
+
+    return __getattr__, __dir__
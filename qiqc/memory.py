@@ -0,0 +1,83 @@
+import os
+import resource
+import sys
+
+import numpy as np
+
+
+def get_rss():
+    # Current resident set size in bytes, from /proc on Linux
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return get_peak_rss()
+
+
+def get_peak_rss():
+    # High-water mark of the resident set size in bytes (kilobytes on
+    # Linux, bytes on macOS)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def sizeof(obj, seen=None, sample_size=1000):
+    # Deep size in bytes. Buffers shared by several arrays or tensors are
+    # counted once, and long sequences of Python objects (e.g. token lists
+    # of a DataFrame column) are estimated from a sample.
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    # torch and pandas are only checked for when already imported
+    torch = sys.modules.get('torch')
+    pd = sys.modules.get('pandas')
+    if torch is not None and isinstance(obj, torch.Tensor):
+        if obj.device.type == 'meta':
+            return 0
+        storage = obj.untyped_storage()
+        key = ('storage', obj.device.type, storage.data_ptr())
+        if key in seen:
+            return 0
+        seen.add(key)
+        return storage.nbytes()
+    if isinstance(obj, np.ndarray):
+        # A view keeps its whole base alive, but only the items of an
+        # object array it refers to
+        if isinstance(obj.base, np.ndarray) and obj.dtype != object:
+            return sizeof(obj.base, seen, sample_size)
+        size = obj.nbytes
+        if obj.dtype == object:
+            size += _sizeof_items(obj.ravel(), seen, sample_size)
+        return size
+    if pd is not None and isinstance(obj, (pd.Series, pd.Index)):
+        return sizeof(obj.to_numpy(), seen, sample_size)
+    if pd is not None and isinstance(obj, pd.DataFrame):
+        return sizeof(obj.index, seen, sample_size) + sum(
+            sizeof(obj[k], seen, sample_size) for k in obj.columns)
+    if torch is not None and isinstance(obj, torch.nn.Module):
+        return sys.getsizeof(obj) + sum(
+            sizeof(x, seen, sample_size)
+            for x in [*obj.parameters(), *obj.buffers()])
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + _sizeof_items(
+            [*obj.keys(), *obj.values()], seen, sample_size)
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return sys.getsizeof(obj) + _sizeof_items(
+            list(obj), seen, sample_size)
+    if isinstance(obj, (str, bytes, int, float, bool, type(None))):
+        return sys.getsizeof(obj)
+    if hasattr(obj, '__dict__'):
+        return sys.getsizeof(obj) + sizeof(vars(obj), seen, sample_size)
+    return sys.getsizeof(obj)
+
+
+def _sizeof_items(items, seen, sample_size):
+    n = len(items)
+    if n <= 10 * sample_size:
+        return sum(sizeof(x, seen, sample_size) for x in items)
+    indices = np.linspace(0, n - 1, sample_size).astype(int)
+    size = sum(sizeof(items[i], seen, sample_size) for i in indices)
+    return int(size * n / sample_size)
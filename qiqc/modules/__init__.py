@@ -1,15 +1,30 @@
-from qiqc.modules.wrappers.aggregator import AggregatorWrapper  # NOQA
-from qiqc.modules.wrappers.encoder import EncoderWrapper  # NOQA
-from qiqc.modules.wrappers.embedding import EmbeddingWrapper  # NOQA
-from qiqc.modules.wrappers.fc import MLPWrapper  # NOQA
+from qiqc.lazy import lazy_exports
 
-from qiqc.modules.aggregator.state import BiRNNLastStateAggregator  # NOQA
-from qiqc.modules.aggregator.pooling import AvgPoolingAggregator  # NOQA
-from qiqc.modules.aggregator.pooling import SumPoolingAggregator  # NOQA
-from qiqc.modules.aggregator.pooling import MaxPoolingAggregator  # NOQA
-from qiqc.modules.classifier import BinaryClassifier  # NOQA
-from qiqc.modules.encoder.attention import MultiHeadAttention  # NOQA
-from qiqc.modules.encoder.attention import MultiHeadSelfAttention  # NOQA
-from qiqc.modules.encoder.rnn import LSTMEncoder  # NOQA
-from qiqc.modules.encoder.rnn import LSTMGRUEncoder  # NOQA
-from qiqc.modules.ensembler.simple import AverageEnsembler  # NOQA
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'AggregatorWrapper': '.wrappers.aggregator',
+    'EncoderWrapper': '.wrappers.encoder',
+    'EmbeddingWrapper': '.wrappers.embedding',
+    'MLPWrapper': '.wrappers.fc',
+
+    'BiRNNLastStateAggregator': '.aggregator.state',
+    'AvgPoolingAggregator': '.aggregator.pooling',
+    'SumPoolingAggregator': '.aggregator.pooling',
+    'MaxPoolingAggregator': '.aggregator.pooling',
+    'MultiPoolingAggregator': '.aggregator.pooling',
+    'BinaryClassifier': '.classifier',
+    'MultiHeadAttention': '.encoder.attention',
+    'MultiHeadSelfAttention': '.encoder.attention',
+    'SelfAttentionEncoder': '.encoder.attention',
+    'CNNEncoder': '.encoder.cnn',
+    'LSTMEncoder': '.encoder.rnn',
+    'LSTMGRUEncoder': '.encoder.rnn',
+    'AverageEnsembler': '.ensembler.simple',
+    'WeightAverageEnsembler': '.ensembler.swa',
+    'ScriptedEnsembler': '.export',
+    'export_ensembler': '.export',
+    'script_classifier': '.export',
+    'script_ensembler': '.export',
+    'InferenceEngine': '.inference',
+    'quantize_ensembler': '.quantization',
+    'quantize_model': '.quantization',
+})
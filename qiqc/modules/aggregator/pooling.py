@@ -35,3 +35,50 @@ class AvgPoolingAggregator(nn.Module):
         maxlen = mask.sum(dim=1)
         h /= maxlen[:, None].type(torch.float)
         return h
+
+
+@register_aggregator('multi')
+class MultiPoolingAggregator(nn.Module):
+
+    def __init__(self, config, in_size):
+        super().__init__()
+        self.poolings = config.aggregator_poolings
+        if 'attention' in self.poolings:
+            self.attention = nn.Linear(in_size, 1)
+        self.out_size = in_size * len(self.poolings)
+
+    @classmethod
+    def add_args(cls, parser):
+        parser.add_argument(
+            '--aggregator-poolings', nargs='+', default=['max', 'avg', 'last'],
+            choices=['max', 'sum', 'avg', 'last', 'attention'])
+
+    def forward(self, hs, mask):
+        # Only max pooling copies the hidden states with the mask applied,
+        # every other pooling reduces hs in place with a masked matmul
+        batchsize, maxlen, n_hidden = hs.shape
+        weights = mask.type(hs.dtype).unsqueeze(1)
+        if {'sum', 'avg'} & set(self.poolings):
+            h_sum = torch.bmm(weights, hs).squeeze(1)
+
+        outputs = []
+        for pooling in self.poolings:
+            if pooling == 'max':
+                h = hs.masked_fill(~mask.unsqueeze(2), -np.inf).max(dim=1)[0]
+            elif pooling == 'sum':
+                h = h_sum
+            elif pooling == 'avg':
+                h = h_sum / weights.sum(dim=2)
+            elif pooling == 'last':
+                idx = mask.sum(dim=1) - 1
+                batch_idx = torch.arange(batchsize, device=hs.device)
+                h = torch.cat([
+                    hs[batch_idx, idx, :n_hidden // 2],
+                    hs[:, 0, n_hidden // 2:]], dim=1)
+            elif pooling == 'attention':
+                scores = self.attention(hs).squeeze(2)
+                scores = scores.masked_fill(~mask, -np.inf)
+                p_attn = torch.softmax(scores, dim=1).unsqueeze(1)
+                h = torch.bmm(p_attn, hs).squeeze(1)
+            outputs.append(h)
+        return torch.cat(outputs, dim=1)
@@ -17,11 +17,16 @@ class BinaryClassifier(nn.Module):
 
     def calc_loss(self, X, X2, t, W=None):
         y = self.forward(X, X2)
-        loss = self.lossfunc(y, t)
+        return self.calc_loss_from_output(y, t)
+
+    def calc_loss_from_output(self, y, t):
+        y = y.float()
+        with torch.autocast(y.device.type, enabled=False):
+            loss = self.lossfunc(y, t)
         output = dict(
-            y=torch.sigmoid(y).cpu().detach().numpy(),
-            t=t.cpu().detach().numpy(),
-            loss=loss.cpu().detach().numpy(),
+            y=torch.sigmoid(y).detach(),
+            t=t.detach(),
+            loss=loss.detach(),
         )
         return loss, output
 
@@ -37,17 +42,28 @@ class BinaryClassifier(nn.Module):
 
     def predict_proba(self, X, X2):
         y = self.forward(X, X2)
-        proba = torch.sigmoid(y).cpu().detach().numpy()
+        proba = torch.sigmoid(y.float()).cpu().detach().numpy()
         return proba
 
     def predict_features(self, X, X2):
+        h, mask = self.embed(X)
+        return self.predict_features_from_embedding(h, mask, X2)
+
+    def embed(self, X):
         mask = X != 0
         maxlen = (mask == 1).any(dim=0).sum()
         X = X[:, :maxlen]
         mask = mask[:, :maxlen]
-
         h = self.embedding(X)
+        return h, mask
+
+    def predict_features_from_embedding(self, h, mask, X2):
         h = self.encoder(h, mask)
         h = self.aggregator(h, mask)
         h = self.mlp(h, X2)
         return h
+
+    def predict_from_embedding(self, h, mask, X2):
+        h = self.predict_features_from_embedding(h, mask, X2)
+        out = self.out(h)
+        return out
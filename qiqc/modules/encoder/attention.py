@@ -5,6 +5,9 @@ import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+from qiqc.registry import register_encoder
+from qiqc.registry import AGGREGATOR_REGISTRY
+
 
 class StandAloneLinearAttention(nn.Module):
 
@@ -13,14 +16,9 @@ class StandAloneLinearAttention(nn.Module):
         self.linear = nn.Linear(n_input, 1)
 
     def forward(self, h, mask):
-        batchsize, maxlen, n_input = h.shape
-        h_flatten = h.contiguous().view(-1, n_input)
-        scores = self.linear(h_flatten)
-        fill_value = torch.full(scores.shape, -np.inf).to(h.device)
-        scores = torch.where(mask.contiguous().view(-1, 1), scores, fill_value)
-        p_attn = F.softmax(scores.view(batchsize, maxlen, 1), dim=1)
-        h = h * p_attn
-
+        scores = self.linear(h)
+        scores = scores.masked_fill(~mask.unsqueeze(2), -np.inf)
+        p_attn = F.softmax(scores, dim=1)
         return h * p_attn
 
 
@@ -54,28 +52,27 @@ class MultiHeadAttention(nn.Module):
         self.linear_layers = nn.ModuleList(
             [nn.Linear(in_size, out_size) for _ in range(3)])
         self.output_linear = nn.Linear(out_size, out_size)
-        self.attention = PairwiseDotAttention()
-
-        self.dropout = nn.Dropout(p=dropout)
+        self.dropout = dropout
 
     def forward(self, query, key, value, mask=None):
-        if len(mask.shape) == 2:
-            batchsize, maxlen = mask.shape
-            mask = mask.unsqueeze(1).repeat(1, maxlen, 1).unsqueeze(1)
-        elif len(mask.shape) == 4:
-            batchsize, _, maxlen, maxlen = mask.shape
-        else:
-            raise ValueError
+        batchsize, maxlen, _ = query.shape
+        if mask is not None:
+            if len(mask.shape) == 2:
+                # Broadcast the key mask over heads and queries
+                mask = mask[:, None, None, :]
+            elif len(mask.shape) != 4:
+                raise ValueError
 
         # 1) Do all the linear projections in batch from out_size => h x d_k
         query, key, value = [
-            l(x).view(batchsize, maxlen, self.attn_heads, self.out_size_child)
-                .transpose(1, 2)
-            for l, x in zip(self.linear_layers, (query, key, value))]
+            layer(x).view(batchsize, -1, self.attn_heads,
+                          self.out_size_child).transpose(1, 2)
+            for layer, x in zip(self.linear_layers, (query, key, value))]
 
-        # 2) Apply attention on all the projected vectors in batch.
-        x, attn = self.attention(
-            query, key, value, mask=mask, dropout=self.dropout)
+        # 2) Apply fused attention on all the projected vectors in batch.
+        x = F.scaled_dot_product_attention(
+            query, key, value, attn_mask=mask,
+            dropout_p=self.dropout if self.training else 0.)
 
         # 3) "Concat" using a view and apply a final linear.
         x = x.transpose(1, 2).contiguous().view(
@@ -88,3 +85,86 @@ class MultiHeadSelfAttention(MultiHeadAttention):
 
     def forward(self, h, mask):
         return super().forward(h, h, h, mask=mask)
+
+
+class TransformerEncoderLayer(nn.Module):
+
+    def __init__(self, n_hidden, attn_heads, n_feedforward, dropout=0.):
+        super().__init__()
+        self.attention = MultiHeadSelfAttention(
+            attn_heads, n_hidden, n_hidden, dropout)
+        self.feedforward = nn.Sequential(
+            nn.Linear(n_hidden, n_feedforward),
+            nn.ReLU(True),
+            nn.Dropout(dropout),
+            nn.Linear(n_feedforward, n_hidden),
+        )
+        self.norm1 = nn.LayerNorm(n_hidden)
+        self.norm2 = nn.LayerNorm(n_hidden)
+        self.dropout = nn.Dropout(dropout)
+
+    def forward(self, h, mask):
+        h = self.norm1(h + self.dropout(self.attention(h, mask)))
+        h = self.norm2(h + self.dropout(self.feedforward(h)))
+        return h
+
+
+def sinusoidal_position_encoding(maxlen, n_hidden):
+    position = torch.arange(maxlen, dtype=torch.float)[:, None]
+    div_term = torch.exp(
+        torch.arange(0, n_hidden, 2, dtype=torch.float)
+        * (-math.log(10000.) / n_hidden))
+    encoding = torch.zeros(maxlen, n_hidden)
+    encoding[:, 0::2] = torch.sin(position * div_term)
+    encoding[:, 1::2] = torch.cos(position * div_term)[:, :n_hidden // 2]
+    return encoding
+
+
+@register_encoder('attention')
+class SelfAttentionEncoder(nn.Module):
+
+    def __init__(self, config, in_size):
+        super().__init__()
+        n_hidden = config.encoder_n_hidden
+        self.input_linear = nn.Linear(in_size, n_hidden)
+        self.maxlen = int(config.maxlen)
+        if config.encoder_positional == 'sinusoid':
+            self.register_buffer('position', sinusoidal_position_encoding(
+                self.maxlen, n_hidden), persistent=False)
+        else:
+            self.position = None
+        self.layers = nn.ModuleList([
+            TransformerEncoderLayer(
+                n_hidden, config.encoder_n_heads,
+                config.encoder_n_feedforward, config.encoder_dropout)
+            for _ in range(config.encoder_n_layers)])
+        self.out_size = n_hidden
+
+    @classmethod
+    def add_args(self, parser):
+        parser.add_argument('--encoder-dropout', type=float, default=0.)
+        parser.add_argument('--encoder-n-hidden', type=int)
+        parser.add_argument('--encoder-n-layers', type=int)
+        parser.add_argument('--encoder-n-heads', type=int, default=4)
+        parser.add_argument('--encoder-n-feedforward', type=int, default=512)
+        parser.add_argument('--encoder-positional', type=str,
+                            choices=['none', 'sinusoid'], default='sinusoid')
+        parser.add_argument('--encoder-aggregator', type=str,
+                            choices=AGGREGATOR_REGISTRY)
+
+    def reset_buffers(self):
+        # Buffers that are not saved in state dicts, e.g. after building on
+        # the meta device and loading the weights
+        if self.position is not None:
+            self.position = sinusoidal_position_encoding(
+                self.maxlen, self.out_size)
+
+    def forward(self, input, mask):
+        # Keep rows without any token from attending to nothing
+        mask = mask | ~mask.any(dim=1, keepdim=True)
+        h = self.input_linear(input)
+        if self.position is not None:
+            h = h + self.position[:h.shape[1]]
+        for layer in self.layers:
+            h = layer(h, mask)
+        return h
@@ -0,0 +1,57 @@
+import torch
+from torch import nn
+
+from qiqc.registry import register_encoder
+from qiqc.registry import AGGREGATOR_REGISTRY
+
+
+class MultiWidthConv1d(nn.Module):
+
+    def __init__(self, in_size, n_hidden, kernel_sizes, dilation=1):
+        super().__init__()
+        self.convs = nn.ModuleList([
+            nn.Conv1d(in_size, n_hidden, kernel_size,
+                      dilation=dilation, padding='same')
+            for kernel_size in kernel_sizes])
+        self.out_size = n_hidden * len(kernel_sizes)
+
+    def forward(self, h):
+        return torch.cat([conv(h) for conv in self.convs], dim=1)
+
+
+@register_encoder('cnn')
+class CNNEncoder(nn.Module):
+
+    def __init__(self, config, in_size):
+        super().__init__()
+        convs = []
+        for i in range(config.encoder_n_layers):
+            conv = MultiWidthConv1d(
+                in_size, config.encoder_n_hidden, config.encoder_kernel_sizes,
+                dilation=config.encoder_dilation ** i)
+            in_size = conv.out_size
+            convs.append(conv)
+        self.convs = nn.ModuleList(convs)
+        self.actfun = nn.ReLU(True)
+        self.dropout = nn.Dropout(config.encoder_dropout)
+        self.out_size = in_size
+
+    @classmethod
+    def add_args(self, parser):
+        parser.add_argument('--encoder-dropout', type=float, default=0.)
+        parser.add_argument('--encoder-n-hidden', type=int)
+        parser.add_argument('--encoder-n-layers', type=int)
+        parser.add_argument('--encoder-kernel-sizes', type=int, nargs='+',
+                            default=[1, 3, 5])
+        parser.add_argument('--encoder-dilation', type=int, default=1)
+        parser.add_argument('--encoder-aggregator', type=str,
+                            choices=AGGREGATOR_REGISTRY)
+
+    def forward(self, input, mask):
+        # Zero padded positions before every convolution so that they never
+        # leak into the receptive field of valid tokens
+        mask = mask.unsqueeze(1).type(input.dtype)
+        h = input.transpose(1, 2)
+        for conv in self.convs:
+            h = self.dropout(self.actfun(conv(h * mask)))
+        return (h * mask).transpose(1, 2)
@@ -1,11 +1,7 @@
-from collections import defaultdict
-
 import numpy as np
-import torch
-from torch.utils.data import DataLoader
-from tqdm import tqdm
 
 from qiqc.modules.ensembler.base import BaseEnsembler
+from qiqc.modules.inference import InferenceEngine
 
 
 class AverageEnsembler(BaseEnsembler):
@@ -17,6 +13,10 @@ class AverageEnsembler(BaseEnsembler):
         self.device = config.device
         self.batchsize_train = config.batchsize
         self.batchsize_valid = config.batchsize_valid
+        self.precision = config.precision
+        self.inference_mode = config.inference_mode
+        self.inference_threads = config.inference_threads
+        self.verbose = True
         self.threshold_cv = np.array(
             [m.threshold for m in models]).mean()
         self.threshold = self.threshold_cv
@@ -25,18 +25,19 @@ class AverageEnsembler(BaseEnsembler):
         # Nothing to do
         pass
 
+    def build_engine(self):
+        # The engine is reused across calls. Copies with other members or
+        # settings (e.g. quantized or fp32 references) build their own.
+        key = (tuple(id(m) for m in self.models), self.batchsize_valid,
+               self.device, self.precision, self.inference_mode,
+               self.inference_threads, self.verbose)
+        if getattr(self, '_engine_key', None) != key:
+            self._engine = InferenceEngine(
+                self.models, self.batchsize_valid, self.device,
+                self.precision, mode=self.inference_mode,
+                n_threads=self.inference_threads, verbose=self.verbose)
+            self._engine_key = key
+        return self._engine
+
     def predict_proba(self, X, X2):
-        pred_X = X.to(self.device)
-        pred_X2 = X2.to(self.device)
-        dataset = torch.utils.data.TensorDataset(pred_X, pred_X2)
-        iterator = DataLoader(
-            dataset, batch_size=self.batchsize_valid, shuffle=False)
-        ys = defaultdict(list)
-        for batch in tqdm(iterator, desc='submit', leave=False):
-            for i, model in enumerate(self.models):
-                model.eval()
-                ys[i].append(model.predict_proba(*batch))
-        ys = np.concatenate(
-            [np.concatenate(_ys) for _ys in ys.values()], axis=1)
-        y = ys.mean(axis=1, keepdims=True)
-        return y
+        return self.build_engine().predict_proba(X, X2)
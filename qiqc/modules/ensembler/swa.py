@@ -0,0 +1,95 @@
+from collections import OrderedDict
+from copy import deepcopy
+
+import numpy as np
+import torch
+from torch import nn
+
+from qiqc.datasets import BatchIterator
+from qiqc.modules.ensembler.simple import AverageEnsembler
+from qiqc.modules.inference import InferenceEngine
+from qiqc.training.checkpoint import load_trainable_state_dict
+from qiqc.training.checkpoint import trainable_state_dict
+from qiqc.training.model_selection.results import classification_metrics
+
+
+def average_models(models):
+    # Frozen parameters are shared, trainable parameters and float buffers
+    # are averaged
+    memo = {id(p): p for p in models[0].parameters() if not p.requires_grad}
+    averaged = deepcopy(models[0], memo=memo)
+    states = [trainable_state_dict(m) for m in models]
+    state = {}
+    for k, v in states[0].items():
+        assert all(s[k].shape == v.shape for s in states), \
+            f'Snapshots are not compatible at {k}'
+        if v.is_floating_point():
+            v = torch.stack([s[k] for s in states]).mean(dim=0)
+        state[k] = v
+    return load_trainable_state_dict(averaged, state)
+
+
+def update_bn(model, iterator):
+    # Recompute running statistics of BatchNorm layers with an equal weight
+    # for every batch, as in SWA
+    bns = [m for m in model.modules()
+           if isinstance(m, nn.modules.batchnorm._BatchNorm)]
+    if len(bns) == 0:
+        return model
+    momenta = {}
+    for bn in bns:
+        bn.reset_running_stats()
+        momenta[bn] = bn.momentum
+        bn.momentum = None
+    model.train()
+    with torch.no_grad():
+        for X, X2 in iterator:
+            model(X, X2)
+    for bn in bns:
+        bn.momentum = momenta[bn]
+    model.eval()
+    return model
+
+
+class WeightAverageEnsembler(AverageEnsembler):
+
+    def __init__(self, config, models, results):
+        super().__init__(config, models, results)
+        self.update_bn = config.ensembler_update_bn
+
+    def fit(self, X, X2, t, test_size=0.1):
+        # Snapshots of the same fold are collapsed into a single model, and
+        # its threshold is chosen on the valid split of that fold
+        folds = OrderedDict()
+        for model in self.models:
+            folds.setdefault(model.i_cv, []).append(model)
+
+        models = []
+        for i_cv, snapshots in folds.items():
+            model = average_models(snapshots)
+            model.i_cv = i_cv
+            model.threshold = np.mean([m.threshold for m in snapshots])
+            valid_indices = getattr(self.results[i_cv], 'indices', None)
+            if valid_indices is not None:
+                train_indices = np.setdiff1d(np.arange(len(X)), valid_indices)
+                if self.update_bn:
+                    iterator = BatchIterator(
+                        (X[train_indices].to(self.device),
+                         X2[train_indices].to(self.device)),
+                        batch_size=self.batchsize_train)
+                    update_bn(model, iterator)
+                model.threshold = self.fit_threshold(
+                    model, X[valid_indices], X2[valid_indices],
+                    t[valid_indices], model.threshold)
+            models.append(model)
+
+        self.models = models
+        self.threshold_cv = np.array([m.threshold for m in models]).mean()
+        self.threshold = self.threshold_cv
+
+    def fit_threshold(self, model, X, X2, t, default):
+        engine = InferenceEngine(
+            [model], self.batchsize_valid, self.device, self.precision)
+        y = engine.predict_proba(X, X2)
+        score = classification_metrics(y, t.cpu().numpy())
+        return score.get('threshold', default)
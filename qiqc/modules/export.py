@@ -0,0 +1,58 @@
+import warnings
+from copy import deepcopy
+
+import torch
+from torch import nn
+
+
+class ScriptedEnsembler(nn.Module):
+
+    def __init__(self, models, threshold):
+        super().__init__()
+        self.models = nn.ModuleList(models)
+        self.threshold = float(threshold)
+
+    def forward(self, X, X2):
+        ys = []
+        for model in self.models:
+            ys.append(torch.sigmoid(model(X, X2)))
+        return torch.stack(ys).mean(dim=0)
+
+    @torch.jit.export
+    def predict(self, X, X2):
+        return (self.forward(X, X2) > self.threshold).int()
+
+
+def trace_classifier(model, X, X2):
+    model = deepcopy(model).cpu().eval()
+    example_inputs = (X[:2].cpu(), X2[:2].cpu())
+    with warnings.catch_warnings(), torch.no_grad():
+        # Padding trimming and batch size stay dynamic in the traced graph
+        warnings.simplefilter('ignore', torch.jit.TracerWarning)
+        traced = torch.jit.trace(model, example_inputs, check_trace=False)
+    return traced
+
+
+def script_ensemble(models, threshold):
+    scripted = torch.jit.script(ScriptedEnsembler(models, threshold).eval())
+    return torch.jit.freeze(
+        scripted, preserved_attrs=['predict', 'threshold'])
+
+
+def script_classifier(model, X, X2):
+    traced = trace_classifier(model, X, X2)
+    return script_ensemble([traced], model.threshold)
+
+
+def script_ensembler(ensembler, X, X2):
+    traced = [trace_classifier(m, X, X2) for m in ensembler.models]
+    return script_ensemble(traced, ensembler.threshold)
+
+
+def export_ensembler(ensembler, X, X2, outdir):
+    # Saved modules depend only on torch, so they can be loaded with
+    # torch.jit.load in a process that never imports qiqc
+    outdir.mkdir(parents=True, exist_ok=True)
+    for i, model in enumerate(ensembler.models):
+        script_classifier(model, X, X2).save(str(outdir / f'model{i}.pt'))
+    script_ensembler(ensembler, X, X2).save(str(outdir / 'ensembler.pt'))
@@ -0,0 +1,97 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
+from tqdm import tqdm
+
+from qiqc import tracing
+from qiqc.datasets import BatchIterator
+from qiqc.utils import autocast
+
+
+def group_by_embedding(models):
+    # Members whose frozen embeddings hold the same weights (e.g. snapshots
+    # of a fold) share a single embedding lookup per batch
+    groups = []
+    for model in models:
+        weight = model.embedding.module.weight
+        for group in groups:
+            _weight = group[0].embedding.module.weight
+            if weight.data_ptr() == _weight.data_ptr() or (
+                    weight.shape == _weight.shape and
+                    torch.equal(weight, _weight)):
+                group.append(model)
+                break
+        else:
+            groups.append([model])
+    return groups
+
+
+class InferenceEngine(object):
+
+    def __init__(self, models, batch_size, device=None, precision='fp32',
+                 mode='shared_embedding', n_threads=None, verbose=False):
+        # In shared_embedding mode, members that share embedding weights
+        # share one embedding lookup per batch and then run the rest of
+        # their forward one after another. In threaded mode, members run
+        # concurrently on a thread pool.
+        assert mode in ('shared_embedding', 'threaded')
+        self.models = models
+        self.batch_size = batch_size
+        self.device = device
+        self.precision = precision
+        self.mode = mode
+        self.n_threads = n_threads or len(models)
+        self.verbose = verbose
+        # Members are grouped once, which compares whole embedding matrices
+        self.groups = group_by_embedding(models)
+
+    def predict_proba(self, X, X2):
+        with tracing.trace('predict', n_items=len(X), mode=self.mode):
+            return self._predict_proba(X, X2)
+
+    def _predict_proba(self, X, X2):
+        for model in self.models:
+            model.eval()
+        X, X2 = X.to(self.device), X2.to(self.device)
+        if len(X) == 0:
+            return np.zeros((0, 1), 'f')
+
+        # Batches of similar lengths make padding trimming effective
+        order = torch.argsort((X != 0).sum(dim=1), stable=True)
+        iterator = BatchIterator(
+            (X[order], X2[order]), batch_size=self.batch_size)
+        ys = []
+        with ThreadPoolExecutor(self.n_threads) as executor:
+            for batch in tqdm(iterator, desc='submit', leave=False,
+                              disable=not self.verbose):
+                ys.append(self.predict_batch(*batch, executor=executor))
+        y = torch.cat(ys)
+
+        # Restore the original order
+        _y = torch.empty_like(y)
+        _y[order] = y
+        return _y.cpu().numpy()
+
+    def predict_batch(self, X, X2, executor=None):
+        if self.mode == 'threaded':
+            ys = list(executor.map(
+                lambda model: self.predict_member(model, X, X2),
+                self.models))
+        else:
+            ys = [y for group in self.groups
+                  for y in self.predict_group(group, X, X2)]
+        return torch.stack(ys).mean(dim=0)
+
+    def predict_group(self, group, X, X2):
+        with torch.inference_mode(), autocast(self.precision, self.device):
+            h, mask = group[0].embed(X)
+            ys = [model.predict_from_embedding(h, mask, X2)
+                  for model in group]
+        return [torch.sigmoid(y.float()) for y in ys]
+
+    def predict_member(self, model, X, X2):
+        # Grad mode and autocast are thread local
+        with torch.inference_mode(), autocast(self.precision, self.device):
+            y = model(X, X2)
+        return torch.sigmoid(y.float())
@@ -0,0 +1,24 @@
+from copy import copy, deepcopy
+
+import torch
+from torch import nn
+from torch.ao.quantization import quantize_dynamic
+
+
+QUANTIZABLE_MODULES = {nn.LSTM, nn.GRU, nn.Linear}
+
+
+def quantize_model(model, dtype=torch.qint8):
+    model = deepcopy(model).cpu().eval()
+    quantize_dynamic(model, QUANTIZABLE_MODULES, dtype=dtype, inplace=True)
+    model.device = torch.device('cpu')
+    return model
+
+
+def quantize_ensembler(ensembler, dtype=torch.qint8):
+    # Dynamic quantized kernels only run on CPU
+    quantized = copy(ensembler)
+    quantized.models = [quantize_model(m, dtype) for m in ensembler.models]
+    quantized.device = torch.device('cpu')
+    quantized.precision = 'fp32'
+    return quantized
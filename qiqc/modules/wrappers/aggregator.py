@@ -7,10 +7,15 @@ class AggregatorWrapper(NNModuleWrapperBase):
     default_config = None
     registry = AGGREGATOR_REGISTRY
 
-    def __init__(self, config):
+    def __init__(self, config, in_size=None):
         super().__init__()
         self.config = config
-        self.module = self.registry[config.aggregator]()
+        aggregator = self.registry[config.aggregator]
+        if hasattr(aggregator, 'add_args'):
+            self.module = aggregator(config, in_size)
+        else:
+            self.module = aggregator()
+        self.out_size = getattr(self.module, 'out_size', in_size)
 
     @classmethod
     def add_args(cls, parser):
@@ -21,7 +26,9 @@ class AggregatorWrapper(NNModuleWrapperBase):
 
     @classmethod
     def add_extra_args(cls, parser, config):
-        pass
+        aggregator = cls.registry[config.aggregator]
+        if hasattr(aggregator, 'add_args'):
+            aggregator.add_args(parser)
 
     def forward(self, X, mask):
         h = self.module(X, mask)
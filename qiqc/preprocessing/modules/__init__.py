@@ -1,23 +1,27 @@
-from qiqc.preprocessing.modules.wrappers.normalizer import TextNormalizerWrapper  # NOQA
-from qiqc.preprocessing.modules.wrappers.tokenizer import TextTokenizerWrapper  # NOQA
-from qiqc.preprocessing.modules.wrappers.featurizer import WordEmbeddingFeaturizerWrapper  # NOQA
-from qiqc.preprocessing.modules.wrappers.featurizer import WordExtraFeaturizerWrapper  # NOQA
-from qiqc.preprocessing.modules.wrappers.featurizer import SentenceExtraFeaturizerWrapper  # NOQA
+from qiqc.lazy import lazy_exports
 
-from qiqc.preprocessing.modules.featurizers.pretrained_vector import load_pretrained_vectors  # NOQA
-from qiqc.preprocessing.modules.featurizers.word_embedding_features import Word2VecFeaturizer  # NOQA
-from qiqc.preprocessing.modules.featurizers.word_embedding_features import FastTextFeaturizer  # NOQA
-from qiqc.preprocessing.modules.featurizers.word_extra_features import IDFWordFeaturizer  # NOQA
-from qiqc.preprocessing.modules.featurizers.word_extra_features import UnkWordFeaturizer  # NOQA
-from qiqc.preprocessing.modules.featurizers.sentence_extra_features import CharacterStatisticsFeaturizer  # NOQA
-from qiqc.preprocessing.modules.featurizers.sentence_extra_features import WordStatisticsFeaturizer  # NOQA
-from qiqc.preprocessing.modules.normalizers.rulebase import unidecode_weak  # NOQA
-from qiqc.preprocessing.modules.normalizers.rulebase import cylower  # NOQA
-from qiqc.preprocessing.modules.normalizers.rulebase import StringReplacer  # NOQA
-from qiqc.preprocessing.modules.normalizers.rulebase import RegExpReplacer  # NOQA
-from qiqc.preprocessing.modules.normalizers.rulebase import PunctSpacer  # NOQA
-from qiqc.preprocessing.modules.normalizers.rulebase import NumberReplacer  # NOQA
-from qiqc.preprocessing.modules.normalizers.rulebase import MisspellReplacer  # NOQA
-from qiqc.preprocessing.modules.normalizers.rulebase import KerasFilterReplacer  # NOQA
-from qiqc.preprocessing.modules.tokenizers.word import cysplit  # NOQA
-from qiqc.preprocessing.modules.vocab import WordVocab  # NOQA
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'TextNormalizerWrapper': '.wrappers.normalizer',
+    'TextTokenizerWrapper': '.wrappers.tokenizer',
+    'WordEmbeddingFeaturizerWrapper': '.wrappers.featurizer',
+    'WordExtraFeaturizerWrapper': '.wrappers.featurizer',
+    'SentenceExtraFeaturizerWrapper': '.wrappers.featurizer',
+
+    'load_pretrained_vectors': '.featurizers.pretrained_vector',
+    'Word2VecFeaturizer': '.featurizers.word_embedding_features',
+    'FastTextFeaturizer': '.featurizers.word_embedding_features',
+    'IDFWordFeaturizer': '.featurizers.word_extra_features',
+    'UnkWordFeaturizer': '.featurizers.word_extra_features',
+    'CharacterStatisticsFeaturizer': '.featurizers.sentence_extra_features',
+    'WordStatisticsFeaturizer': '.featurizers.sentence_extra_features',
+    'unidecode_weak': '.normalizers.rulebase',
+    'cylower': '.normalizers.rulebase',
+    'StringReplacer': '.normalizers.rulebase',
+    'RegExpReplacer': '.normalizers.rulebase',
+    'PunctSpacer': '.normalizers.rulebase',
+    'NumberReplacer': '.normalizers.rulebase',
+    'MisspellReplacer': '.normalizers.rulebase',
+    'KerasFilterReplacer': '.normalizers.rulebase',
+    'cysplit': '.tokenizers.word',
+    'WordVocab': '.vocab',
+})
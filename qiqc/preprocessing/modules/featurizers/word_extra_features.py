@@ -1,6 +1,4 @@
 import numpy as np
-import pandas as pd
-from scipy.stats import chi2_contingency
 
 from qiqc.utils import ApplyNdArray
 from qiqc.registry import register_word_extra_features
@@ -31,6 +29,9 @@ class UnkWordFeaturizer(object):
 class Chi2WordFeaturizer(object):
 
     def __call__(self, vocab, threshold=0.01):
+        import pandas as pd
+        from scipy.stats import chi2_contingency
+
         vocab_pos = vocab._counters['train-pos']
         vocab_neg = vocab._counters['train-neg']
 
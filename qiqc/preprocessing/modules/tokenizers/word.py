@@ -1,8 +1,12 @@
-import nltk
-
 from qiqc.registry import register_tokenizer
 from _qiqc.preprocessing.modules.tokenizers.word import cysplit
 
 
+def word_tokenize(x):
+    # nltk takes about a second to import, and only this tokenizer needs it
+    import nltk
+    return nltk.word_tokenize(x)
+
+
 register_tokenizer('space')(cysplit)
-register_tokenizer('word_tokenize')(nltk.word_tokenize)
+register_tokenizer('word_tokenize')(word_tokenize)
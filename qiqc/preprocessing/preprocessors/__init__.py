@@ -1 +1,5 @@
-from qiqc.preprocessing.preprocessors.word import WordbasedPreprocessor  # NOQA
+from qiqc.lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'WordbasedPreprocessor': '.word',
+})
@@ -1,5 +1,6 @@
 import numpy as np
 
+from qiqc import tracing
 from qiqc.preprocessing.modules.vocab import WordVocab
 from qiqc.utils import pad_sequence
 from qiqc.utils import ApplyNdArray, Pipeline
@@ -48,6 +49,7 @@ class WordbasedPreprocessor():
                                  vocab, pretrained_vectors):
         pretrained_vectors_merged = np.stack(
             [wv.vectors for wv in pretrained_vectors.values()]).mean(axis=0)
+        tracing.track('pretrained_vectors_merged', pretrained_vectors_merged)
         vocab.unk = (pretrained_vectors_merged == 0).all(axis=1)
         vocab.known = ~vocab.unk
         embedding_matrices = word_embedding_featurizer(
@@ -1,14 +1,83 @@
+import importlib
+from collections.abc import MutableMapping
+
+
+class LazyRegistry(MutableMapping):
+    # Built-in entries map to the modules registering them, which are
+    # imported on first lookup. Listing and validating choices (e.g. by
+    # argparse) imports nothing.
+
+    def __init__(self, paths=None):
+        self.entries = {}
+        self.paths = dict(paths or {})
+
+    def __getitem__(self, name):
+        if name not in self.entries and name in self.paths:
+            importlib.import_module(self.paths[name])
+        return self.entries[name]
+
+    def __setitem__(self, name, value):
+        self.entries[name] = value
+
+    def __delitem__(self, name):
+        del self.entries[name]
+        self.paths.pop(name, None)
+
+    def __contains__(self, name):
+        return name in self.entries or name in self.paths
+
+    def __iter__(self):
+        yield from self.entries
+        yield from (k for k in self.paths if k not in self.entries)
+
+    def __len__(self):
+        return len(self.entries.keys() | self.paths.keys())
+
+    def __repr__(self):
+        return f'{type(self).__name__}({list(self)})'
+
+
+_NORMALIZERS = 'qiqc.preprocessing.modules.normalizers.rulebase'
+_TOKENIZERS = 'qiqc.preprocessing.modules.tokenizers.word'
+_FEATURIZERS = 'qiqc.preprocessing.modules.featurizers'
+_ENCODERS = 'qiqc.modules.encoder'
+_AGGREGATORS = 'qiqc.modules.aggregator'
+
 # Registries for preprocessing
-NORMALIZER_REGISTRY = {}
-TOKENIZER_REGISTRY = {}
-WORD_EMBEDDING_FEATURIZER_REGISTRY = {}
-WORD_EXTRA_FEATURIZER_REGISTRY = {}
-SENTENCE_EXTRA_FEATURIZER_REGISTRY = {}
+NORMALIZER_REGISTRY = LazyRegistry({
+    k: _NORMALIZERS for k in [
+        'lower', 'punct', 'unidecode', 'unidecode_weak', 'number',
+        'number+underscore', 'misspell', 'keras']})
+TOKENIZER_REGISTRY = LazyRegistry({
+    'space': _TOKENIZERS,
+    'word_tokenize': _TOKENIZERS,
+})
+WORD_EMBEDDING_FEATURIZER_REGISTRY = LazyRegistry({
+    k: f'{_FEATURIZERS}.word_embedding_features'
+    for k in ['pretrained', 'word2vec', 'fasttext']})
+WORD_EXTRA_FEATURIZER_REGISTRY = LazyRegistry({
+    k: f'{_FEATURIZERS}.word_extra_features'
+    for k in ['idf', 'unk', 'chi2']})
+SENTENCE_EXTRA_FEATURIZER_REGISTRY = LazyRegistry({
+    k: f'{_FEATURIZERS}.sentence_extra_features' for k in ['char', 'word']})
 
 # Registries for training
-ENCODER_REGISTRY = {}
-AGGREGATOR_REGISTRY = {}
-ATTENTION_REGISTRY = {}
+ENCODER_REGISTRY = LazyRegistry({
+    'lstm': f'{_ENCODERS}.rnn',
+    'gru': f'{_ENCODERS}.rnn',
+    'lstmgru': f'{_ENCODERS}.rnn',
+    'grulstm': f'{_ENCODERS}.rnn',
+    'cnn': f'{_ENCODERS}.cnn',
+    'attention': f'{_ENCODERS}.attention',
+})
+AGGREGATOR_REGISTRY = LazyRegistry({
+    'max': f'{_AGGREGATORS}.pooling',
+    'sum': f'{_AGGREGATORS}.pooling',
+    'avg': f'{_AGGREGATORS}.pooling',
+    'multi': f'{_AGGREGATORS}.pooling',
+    'last': f'{_AGGREGATORS}.state',
+})
+ATTENTION_REGISTRY = LazyRegistry()
 
 
 def register_preprocessor(name):
@@ -0,0 +1,9 @@
+from qiqc.lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'ModelBundle': '.bundle',
+    'save_bundle': '.bundle',
+    'Histogram': '.server',
+    'MicroBatcher': '.server',
+    'PredictionServer': '.server',
+})
@@ -0,0 +1,154 @@
+import shutil
+from copy import copy
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from qiqc.modules import AverageEnsembler
+from qiqc.modules import quantize_ensembler
+from qiqc.modules import script_ensembler
+from qiqc.preprocessing.modules import SentenceExtraFeaturizerWrapper
+from qiqc.preprocessing.modules import TextNormalizerWrapper
+from qiqc.preprocessing.modules import TextTokenizerWrapper
+from qiqc.serving.format import MappedVocab, encode_vocab
+from qiqc.serving.format import read_bundle_file, write_bundle_file
+from qiqc.training.checkpoint import trainable_state_dict
+from qiqc.utils import Pipeline, load_module, pad_sequence
+
+
+def save_bundle(outdir, config, vocab, sentence_extra_featurizer, models,
+                ensembler, X, X2):
+    # Everything needed to score raw questions without the training data.
+    # Models are rebuilt from the copied model file with build_model, or
+    # loaded from the TorchScript ensemble without qiqc model code.
+    outdir = Path(outdir)
+    outdir.mkdir(parents=True, exist_ok=True)
+    shutil.copy(config.modelfile, outdir / 'modelfile.py')
+
+    # Word features differ by fold (e.g. random vectors of unknown words),
+    # and are stored once per distinct frozen embedding
+    arrays = dict(
+        encode_vocab(vocab.token2id),
+        sentence_extra_mean=np.asarray(sentence_extra_featurizer.mean, 'f'),
+        sentence_extra_std=np.asarray(sentence_extra_featurizer.std, 'f'),
+    )
+    word_features_ids, model_metas = {}, []
+    for i, model in enumerate(models):
+        weight = model.embedding.module.weight
+        if id(weight) not in word_features_ids:
+            word_features_ids[id(weight)] = len(word_features_ids)
+            arrays[f'word_features/{word_features_ids[id(weight)]}'] = \
+                weight.detach().cpu().numpy()
+        state = trainable_state_dict(model)
+        for k, v in state.items():
+            arrays[f'models/{i}/{k}'] = v.cpu().numpy()
+        model_metas.append(dict(
+            threshold=float(model.threshold),
+            word_features=word_features_ids[id(weight)],
+            params=list(state)))
+    write_bundle_file(outdir / 'bundle.bin', config, arrays, dict(
+        threshold=float(ensembler.threshold), models=model_metas))
+    script_ensembler(ensembler, X, X2).save(str(outdir / 'ensembler.pt'))
+
+
+class ModelBundle(object):
+
+    def __init__(self, config, token2id, sentence_extra_mean,
+                 sentence_extra_std, threshold, ensembler):
+        self.config = config
+        self.token2id = token2id
+        self.threshold = threshold
+        self.ensembler = ensembler
+        self.maxlen = int(config.maxlen)
+        self.tokenize = Pipeline(
+            TextNormalizerWrapper(config), TextTokenizerWrapper(config))
+        self.sentence_extra_featurizer = \
+            SentenceExtraFeaturizerWrapper(config)
+        self.sentence_extra_featurizer.mean = sentence_extra_mean
+        self.sentence_extra_featurizer.std = sentence_extra_std
+
+    @classmethod
+    def load(cls, path, backend='torchscript', device=None):
+        assert backend in ('torchscript', 'eager')
+        path = Path(path)
+        meta, config, arrays = read_bundle_file(path / 'bundle.bin')
+        if backend == 'torchscript':
+            ensembler = torch.jit.load(str(path / 'ensembler.pt'))
+        else:
+            ensembler = cls.build_ensembler(
+                path / 'modelfile.py', config, meta, arrays, device)
+        token2id = MappedVocab(
+            arrays['vocab_strings'], arrays['vocab_offsets'],
+            arrays['vocab_ids'])
+        return cls(
+            config, token2id, arrays['sentence_extra_mean'],
+            arrays['sentence_extra_std'], meta['threshold'], ensembler)
+
+    @staticmethod
+    def build_ensembler(modelfile, config, meta, arrays, device=None):
+        config = copy(config)
+        config.device = device
+        modules = load_module(Path(modelfile))
+        n_sentence_extra_features = \
+            SentenceExtraFeaturizerWrapper(config).n_dims
+        models = []
+        for i, model_meta in enumerate(meta['models']):
+            word_features = torch.from_numpy(
+                arrays[f'word_features/{model_meta["word_features"]}'])
+            # Modules are built without allocating weights, which are then
+            # assigned without copies. They stay on the mapped pages shared
+            # by all models and processes.
+            with torch.device('meta'):
+                model = modules.build_model(
+                    config, word_features, n_sentence_extra_features)
+            state = {k: torch.from_numpy(arrays[f'models/{i}/{k}'])
+                     for k in model_meta['params']}
+            state['embedding.module.weight'] = word_features
+            model.load_state_dict(state, assign=True)
+            # Non-persistent buffers are not in the state and still on meta
+            for module in model.modules():
+                if any(b.is_meta for b in module.buffers(recurse=False)):
+                    module.reset_buffers()
+            model.threshold = model_meta['threshold']
+            models.append(model.to_device(device).eval())
+        ensembler = AverageEnsembler(config, models, None)
+        ensembler.threshold = meta['threshold']
+        # No progress bars per served batch
+        ensembler.verbose = False
+        if config.quantize:
+            ensembler = quantize_ensembler(ensembler)
+        return ensembler
+
+    def build_inputs(self, texts):
+        # Same pipeline as training, with unknown tokens dropped. Padding
+        # ids in the middle would cut the trimmed length of a batch short.
+        token2id = self.token2id
+        X = np.array([
+            pad_sequence([i for i in map(token2id.get, self.tokenize(text))
+                          if i is not None], self.maxlen)
+            for text in texts], 'i').reshape(-1, self.maxlen)
+        X2 = np.array([self.sentence_extra_featurizer(text)
+                       for text in texts], 'f')
+        X2 = self.sentence_extra_featurizer.standardize(
+            X2.reshape(len(texts), -1)).astype('f')
+        return torch.from_numpy(X).long(), torch.from_numpy(X2)
+
+    def predict_proba(self, texts):
+        # Questions without any known token are not run through the models,
+        # which would score an all-padding row as NaN, and get 0
+        X, X2 = self.build_inputs(texts)
+        y = np.zeros(len(X), 'f')
+        known = (X != 0).any(dim=1)
+        if not known.any():
+            return y
+        X, X2 = X[known], X2[known]
+        if isinstance(self.ensembler, AverageEnsembler):
+            y[known.numpy()] = self.ensembler.predict_proba(X, X2).ravel()
+        else:
+            with torch.inference_mode():
+                y[known.numpy()] = self.ensembler(X, X2).numpy().ravel()
+        return y
+
+    def predict(self, texts):
+        return (self.predict_proba(texts) > self.threshold).astype('i')
@@ -0,0 +1,115 @@
+import bisect
+import functools
+import hashlib
+import json
+import pickle
+import struct
+
+import numpy as np
+
+# Layout: magic, header length (uint64), JSON header, then 64-byte aligned
+# sections of raw arrays which are memory-mapped on load
+MAGIC = b'QIQCBNDL'
+VERSION = 1
+ALIGNMENT = 64
+
+
+def align(n):
+    return (n + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def config_hash(config):
+    items = sorted((k, repr(v)) for k, v in vars(config).items())
+    return hashlib.sha256(repr(items).encode()).hexdigest()
+
+
+def encode_vocab(token2id):
+    # Tokens are sorted by code point, which is also the order of their
+    # utf-8 bytes
+    tokens = sorted(token2id)
+    encoded = [token.encode('utf-8') for token in tokens]
+    offsets = np.zeros(len(tokens) + 1, 'i8')
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return dict(
+        vocab_strings=np.frombuffer(b''.join(encoded), 'u1'),
+        vocab_offsets=offsets,
+        vocab_ids=np.array([token2id[token] for token in tokens], 'i8'),
+    )
+
+
+class MappedVocab(object):
+
+    def __init__(self, strings, offsets, ids, cache_size=2 ** 16):
+        self.strings = strings
+        self.offsets = offsets
+        self.ids = ids
+        self.get = functools.lru_cache(cache_size)(self._get)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        start, end = self.offsets[i], self.offsets[i + 1]
+        return self.strings[start:end].tobytes().decode('utf-8')
+
+    def __contains__(self, token):
+        return self.get(token) is not None
+
+    def _get(self, token, default=None):
+        i = bisect.bisect_left(self, token)
+        if i < len(self) and self[i] == token:
+            return int(self.ids[i])
+        return default
+
+
+def write_bundle_file(path, config, arrays, meta):
+    config_bytes = pickle.dumps(config)
+    arrays = dict(arrays, config=np.frombuffer(config_bytes, 'u1'))
+    arrays = {k: np.ascontiguousarray(v) for k, v in arrays.items()}
+    sections = {}
+    offset = 0
+    for name, array in arrays.items():
+        sections[name] = dict(
+            offset=offset, nbytes=array.nbytes, dtype=array.dtype.str,
+            shape=list(array.shape))
+        offset = align(offset + array.nbytes)
+    header = json.dumps(dict(
+        version=VERSION,
+        config_hash=config_hash(config),
+        meta=meta,
+        sections=sections,
+    )).encode()
+
+    data_start = align(len(MAGIC) + 8 + len(header))
+    with open(path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header)))
+        f.write(header)
+        for name, array in arrays.items():
+            f.seek(data_start + sections[name]['offset'])
+            array.tofile(f)
+        f.truncate(data_start + offset)
+
+
+def read_bundle_file(path):
+    with open(path, 'rb') as f:
+        assert f.read(len(MAGIC)) == MAGIC, f'{path} is not a model bundle'
+        n_header = struct.unpack('<Q', f.read(8))[0]
+        header = json.loads(f.read(n_header))
+    assert header['version'] == VERSION, header['version']
+
+    # Copy-on-write mapping: pages are shared between processes until
+    # written, and tensors over them are writable
+    data_start = align(len(MAGIC) + 8 + n_header)
+    buffer = np.memmap(path, dtype='u1', mode='c')
+    arrays = {}
+    for name, section in header['sections'].items():
+        start = data_start + section['offset']
+        array = buffer[start:start + section['nbytes']]
+        arrays[name] = array.view(np.dtype(section['dtype'])).reshape(
+            section['shape'])
+
+    config = pickle.loads(arrays.pop('config').tobytes())
+    assert config_hash(config) == header['config_hash'], \
+        'Config does not match the bundle header'
+    return header['meta'], config, arrays
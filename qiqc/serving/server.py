@@ -0,0 +1,182 @@
+import asyncio
+import bisect
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+
+class Histogram(object):
+
+    def __init__(self, bounds):
+        self.bounds = list(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.
+
+    def observe(self, value):
+        # Bucket i counts values <= bounds[i], the last one the overflow
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def to_dict(self):
+        return dict(
+            bounds=self.bounds, counts=self.counts, count=self.count,
+            mean=self.sum / self.count if self.count > 0 else 0.)
+
+
+class MicroBatcher(object):
+
+    def __init__(self, predict, max_batch_size=64, max_wait=0.005):
+        self.predict = predict
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        # Batches run one at a time off the event loop, which keeps
+        # gathering the next batch meanwhile
+        self.executor = ThreadPoolExecutor(1)
+        self.batch_size = Histogram([1, 2, 4, 8, 16, 32, 64, 128, 256, 512])
+
+    async def submit(self, texts):
+        loop = asyncio.get_running_loop()
+        futures = []
+        for text in texts:
+            future = loop.create_future()
+            self.queue.put_nowait((text, future))
+            futures.append(future)
+        return await asyncio.gather(*futures)
+
+    async def next_batch(self):
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.next_batch()
+            texts = [text for text, future in batch]
+            self.batch_size.observe(len(batch))
+            try:
+                ys = await loop.run_in_executor(
+                    self.executor, self.predict, texts)
+            except Exception as e:
+                for text, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (text, future), y in zip(batch, ys):
+                if not future.done():
+                    future.set_result(float(y))
+
+
+class PredictionServer(object):
+
+    def __init__(self, bundle, max_batch_size=64, max_wait=0.005):
+        self.bundle = bundle
+        self.batcher = MicroBatcher(
+            bundle.predict_proba, max_batch_size, max_wait)
+        self.latency = Histogram(
+            [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000])
+        self.n_questions = 0
+
+    async def predict(self, body):
+        request = json.loads(body or b'{}')
+        texts = request.get('questions')
+        if texts is None and 'question' in request:
+            texts = [request['question']]
+        if not isinstance(texts, list) or not all(
+                isinstance(text, str) and len(text) > 0 for text in texts):
+            raise ValueError('Expected non-empty strings in "questions"')
+        ys = await self.batcher.submit(texts)
+        self.n_questions += len(texts)
+        return dict(
+            probabilities=ys,
+            predictions=[int(y > self.bundle.threshold) for y in ys])
+
+    def metrics(self):
+        return dict(
+            n_questions=self.n_questions,
+            latency_ms=self.latency.to_dict(),
+            batch_size=self.batcher.batch_size.to_dict())
+
+    async def route(self, method, path, body):
+        if method == 'POST' and path == '/predict':
+            return HTTPStatus.OK, await self.predict(body)
+        if method == 'GET' and path == '/metrics':
+            return HTTPStatus.OK, self.metrics()
+        if method == 'GET' and path == '/health':
+            return HTTPStatus.OK, dict(status='ok')
+        return HTTPStatus.NOT_FOUND, dict(error=f'{method} {path}')
+
+    async def handle(self, reader, writer):
+        # Minimal HTTP/1.1 with keep-alive
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = time.perf_counter()
+                method, path, version = line.decode('latin-1').split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    k, v = line.decode('latin-1').split(':', 1)
+                    headers[k.strip().lower()] = v.strip()
+                body = await reader.readexactly(
+                    int(headers.get('content-length', 0)))
+
+                try:
+                    status, response = await self.route(method, path, body)
+                except ValueError as e:
+                    status, response = HTTPStatus.BAD_REQUEST, dict(
+                        error=str(e))
+                except Exception as e:
+                    status, response = HTTPStatus.INTERNAL_SERVER_ERROR, \
+                        dict(error=repr(e))
+                try:
+                    payload = json.dumps(response, allow_nan=False).encode()
+                except ValueError as e:
+                    # NaN or infinite scores are not valid JSON
+                    status = HTTPStatus.INTERNAL_SERVER_ERROR
+                    payload = json.dumps(dict(error=repr(e))).encode()
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(
+                    f'HTTP/1.1 {status.value} {status.phrase}\r\n'
+                    f'Content-Type: application/json\r\n'
+                    f'Content-Length: {len(payload)}\r\n'
+                    f'Connection: {"keep-alive" if keep_alive else "close"}'
+                    f'\r\n\r\n'.encode() + payload)
+                await writer.drain()
+                if path == '/predict':
+                    self.latency.observe(
+                        (time.perf_counter() - start) * 1000)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host='127.0.0.1', port=8000):
+        batcher = asyncio.ensure_future(self.batcher.run())
+        server = await asyncio.start_server(self.handle, host, port)
+        print(f'Serving on http://{host}:{port}')
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
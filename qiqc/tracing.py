@@ -0,0 +1,182 @@
+import contextlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+from qiqc.memory import get_peak_rss, get_rss, sizeof
+
+
+class Tracer(object):
+
+    def __init__(self, enabled=True):
+        self.enabled = enabled
+        self.spans = []
+        self.allocations = []
+        self.origin = time.perf_counter()
+        self._local = threading.local()
+
+    @property
+    def stack(self):
+        # Spans nest per thread. A forked process keeps the open spans of
+        # the forking thread, which become parents of its own spans.
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextlib.contextmanager
+    def span(self, name, n_items=None, **args):
+        # The yielded record is mutable, e.g. to set n_items once known
+        if not self.enabled:
+            yield dict(n_items=n_items, args=args)
+            return
+        parent = self.stack[-1] if len(self.stack) > 0 else None
+        span = dict(
+            name=name,
+            path=name if parent is None else f'{parent["path"]}/{name}',
+            depth=len(self.stack),
+            n_items=n_items,
+            args=args,
+            pid=os.getpid(),
+            tid=threading.get_ident(),
+        )
+        self.stack.append(span)
+        rss = get_rss()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield span
+        finally:
+            span['start'] = wall - self.origin
+            span['wall'] = time.perf_counter() - wall
+            span['cpu'] = time.process_time() - cpu
+            span['rss'] = get_rss()
+            span['rss_delta'] = span['rss'] - rss
+            span['peak_rss'] = get_peak_rss()
+            self.stack.pop()
+            self.spans.append(span)
+
+    def track(self, name, obj):
+        # Records the deep size of a live object in the current stage, e.g.
+        # track("df['tokens']", df['tokens']). Nothing is kept of obj.
+        if not self.enabled:
+            return None
+        nbytes = sizeof(obj)
+        self.allocations.append(dict(
+            name=name,
+            nbytes=nbytes,
+            path=self.stack[-1]['path'] if len(self.stack) > 0 else None,
+            pid=os.getpid(),
+            time=time.perf_counter() - self.origin,
+        ))
+        return nbytes
+
+    def extend(self, spans, allocations=()):
+        self.spans.extend(spans)
+        self.allocations.extend(allocations)
+
+    def summary(self):
+        # Aggregated by path in order of first start, e.g. all epochs of
+        # all folds are one row
+        rows = {}
+        for span in sorted(self.spans, key=lambda s: s['start']):
+            row = rows.setdefault(span['path'], dict(
+                name=span['path'], depth=span['depth'], count=0, wall=0.,
+                cpu=0., n_items=None, rss=0, peak_rss=0))
+            row['count'] += 1
+            row['wall'] += span['wall']
+            row['cpu'] += span['cpu']
+            row['rss'] = max(row['rss'], span['rss'])
+            row['peak_rss'] = max(row['peak_rss'], span['peak_rss'])
+            if span['n_items'] is not None:
+                row['n_items'] = (row['n_items'] or 0) + span['n_items']
+        for row in rows.values():
+            row['items_per_sec'] = None
+            if row['n_items'] is not None and row['wall'] > 0:
+                row['items_per_sec'] = row['n_items'] / row['wall']
+        return list(rows.values())
+
+    def memory_report(self, n_top=10):
+        # The high-water mark is attributed to the first stage that ended
+        # with it, innermost first. Consumers are tracked objects at their
+        # largest size.
+        spans = sorted(self.spans, key=lambda s: s['start'] + s['wall'])
+        peak_rss, peak_stage = 0, None
+        for span in spans:
+            if span['peak_rss'] > peak_rss:
+                peak_rss, peak_stage = span['peak_rss'], span['path']
+        consumers = {}
+        for allocation in self.allocations:
+            name = allocation['name']
+            if name not in consumers or \
+                    allocation['nbytes'] > consumers[name]['nbytes']:
+                consumers[name] = allocation
+        consumers = sorted(
+            consumers.values(), key=lambda a: a['nbytes'], reverse=True)
+        stages = [dict(name=s['path'], rss=s['rss'], rss_delta=s['rss_delta'],
+                       peak_rss=s['peak_rss']) for s in spans]
+        return dict(
+            peak_rss=peak_rss,
+            peak_stage=peak_stage,
+            top_consumers=consumers[:n_top],
+            stages=stages,
+            allocations=self.allocations,
+        )
+
+    def to_chrome_trace(self):
+        # Complete events of the Trace Event Format, viewable in
+        # chrome://tracing or Perfetto
+        events = []
+        for span in self.spans:
+            args = dict(span['args'], cpu_ms=span['cpu'] * 1e3)
+            if span['n_items'] is not None:
+                args['n_items'] = span['n_items']
+            events.append(dict(
+                name=span['name'], cat=span['path'].split('/')[0], ph='X',
+                ts=span['start'] * 1e6, dur=span['wall'] * 1e6,
+                pid=span['pid'], tid=span['tid'], args=args))
+            # Counter track of the resident set size at stage boundaries
+            events.append(dict(
+                name='rss', ph='C', ts=(span['start'] + span['wall']) * 1e6,
+                pid=span['pid'], args=dict(mib=span['rss'] / 2 ** 20)))
+        return dict(traceEvents=events, displayTimeUnit='ms')
+
+    def save(self, outdir):
+        outdir = Path(outdir)
+        spans = sorted(self.spans, key=lambda s: s['start'])
+        with open(outdir / 'trace.json', 'w') as f:
+            json.dump(dict(summary=self.summary(), spans=spans), f,
+                      indent=2, default=_to_json)
+        with open(outdir / 'trace_chrome.json', 'w') as f:
+            json.dump(self.to_chrome_trace(), f, default=_to_json)
+        with open(outdir / 'memory.json', 'w') as f:
+            json.dump(self.memory_report(), f, indent=2, default=_to_json)
+
+
+def _to_json(obj):
+    # numpy scalars
+    if hasattr(obj, 'item'):
+        return obj.item()
+    return str(obj)
+
+
+# Tracer of the running pipeline, disabled unless one is set
+_tracer = Tracer(enabled=False)
+
+
+def get_tracer():
+    return _tracer
+
+
+def set_tracer(tracer):
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def trace(name, n_items=None, **args):
+    return _tracer.span(name, n_items, **args)
+
+
+def track(name, obj):
+    return _tracer.track(name, obj)
@@ -1,2 +1,15 @@
-from qiqc.training.model_selection.results import classification_metrics  # NOQA
-from qiqc.training.model_selection.results import ClassificationResult  # NOQA
+from qiqc.lazy import lazy_exports
+
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'classification_metrics': '.model_selection.results',
+    'histogram_classification_metrics': '.model_selection.results',
+    'ClassificationResult': '.model_selection.results',
+    'compare_inference': '.model_selection.results',
+    'DistributedClassifier': '.distributed',
+    'init_distributed': '.distributed',
+    'is_main_process': '.distributed',
+    'Checkpointer': '.checkpoint',
+    'SnapshotStore': '.snapshot',
+    'EarlyStopping': '.early_stopping',
+    'distill': '.distillation',
+})
@@ -0,0 +1,127 @@
+import os
+import random
+from copy import deepcopy
+from pathlib import Path
+
+import numpy as np
+import torch
+
+from qiqc.training.distributed import all_gather_object
+from qiqc.training.distributed import get_rank, get_world_size
+
+
+def trainable_state_dict(model):
+    # Frozen parameters (e.g. pretrained embeddings) are rebuilt from the
+    # preprocessing artifacts, so they are not stored per model
+    frozen = {name for name, p in model.named_parameters()
+              if not p.requires_grad}
+    return {k: v.detach().clone() for k, v in model.state_dict().items()
+            if k not in frozen}
+
+
+def load_trainable_state_dict(model, state):
+    missing, unexpected = model.load_state_dict(state, strict=False)
+    assert len(unexpected) == 0, unexpected
+    frozen = {name for name, p in model.named_parameters()
+              if not p.requires_grad}
+    assert set(missing) <= frozen, set(missing) - frozen
+    return model
+
+
+def get_rng_state():
+    return dict(
+        random=random.getstate(),
+        numpy=np.random.get_state(),
+        torch=torch.get_rng_state(),
+    )
+
+
+def set_rng_state(state):
+    random.setstate(state['random'])
+    np.random.set_state(state['numpy'])
+    torch.set_rng_state(state['torch'])
+
+
+class Checkpointer(object):
+
+    def __init__(self, outdir, enabled=True):
+        self.outdir = Path(outdir)
+        self.enabled = enabled
+
+    def path(self, name):
+        return self.outdir / f'{name}.pt'
+
+    def save(self, name, obj):
+        if not self.enabled:
+            return
+        self.outdir.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so that an interrupted save never
+        # leaves a broken checkpoint behind
+        path = self.path(name)
+        tmp_path = path.with_suffix('.tmp')
+        torch.save(obj, tmp_path)
+        os.replace(tmp_path, path)
+
+    def load(self, name):
+        path = self.path(name)
+        if not path.exists():
+            return None
+        return torch.load(path, weights_only=False)
+
+    def save_preprocessing(self, artifacts):
+        self.save('preprocessing', dict(artifacts, rng=get_rng_state()))
+
+    def load_preprocessing(self):
+        artifacts = self.load('preprocessing')
+        if artifacts is not None:
+            set_rng_state(artifacts.pop('rng'))
+        return artifacts
+
+    def save_epoch(self, i_cv, epoch, model, optimizer, **state):
+        # Called on every rank: data-parallel ranks draw different dropout
+        # masks, so the RNG state of each of them is kept
+        rng = all_gather_object(get_rng_state())
+        self.save(f'fold{i_cv}_epoch', dict(
+            state,
+            epoch=epoch,
+            model=trainable_state_dict(model),
+            optimizer=optimizer.state_dict(),
+            rng=rng,
+        ))
+
+    def load_epoch(self, i_cv, model, optimizer):
+        state = self.load(f'fold{i_cv}_epoch')
+        if state is None:
+            return None
+        load_trainable_state_dict(model, state['model'])
+        optimizer.load_state_dict(state['optimizer'])
+        assert len(state['rng']) == get_world_size(), \
+            f'Checkpoint of {len(state["rng"])} processes'
+        set_rng_state(state['rng'][get_rank()])
+        return state
+
+    def save_fold(self, i_cv, train_result, valid_result, snapshots):
+        self.save(f'fold{i_cv}', dict(
+            train_result=train_result,
+            valid_result=valid_result,
+            snapshots=[self.dump_snapshot(m) for m in snapshots],
+        ))
+
+    def load_fold(self, i_cv, model):
+        state = self.load(f'fold{i_cv}')
+        if state is None:
+            return None
+        snapshots = [
+            self.restore_snapshot(model, s) for s in state['snapshots']]
+        return state['train_result'], state['valid_result'], snapshots
+
+    def dump_snapshot(self, model):
+        return dict(
+            state=trainable_state_dict(model), threshold=model.threshold,
+            i_cv=getattr(model, 'i_cv', None))
+
+    def restore_snapshot(self, model, snapshot):
+        model = load_trainable_state_dict(deepcopy(model), snapshot['state'])
+        model.threshold = snapshot['threshold']
+        model.i_cv = snapshot.get('i_cv')
+        return model
@@ -0,0 +1,74 @@
+import argparse
+from copy import copy
+
+import torch
+from tqdm import tqdm
+
+from qiqc.datasets import BatchIterator
+from qiqc.registry import ENCODER_REGISTRY
+from qiqc.utils import autocast
+
+
+def build_student_config(config):
+    student_config = copy(config)
+    encoder = config.distill_encoder
+    if encoder is not None and encoder != config.encoder:
+        # Options specific to the student encoder take their defaults
+        parser = argparse.ArgumentParser()
+        ENCODER_REGISTRY[encoder].add_args(parser)
+        for k, v in vars(parser.parse_args([])).items():
+            if not hasattr(student_config, k):
+                setattr(student_config, k, v)
+        student_config.encoder = encoder
+    if config.distill_encoder_n_hidden is not None:
+        student_config.encoder_n_hidden = config.distill_encoder_n_hidden
+    if config.distill_encoder_n_layers is not None:
+        student_config.encoder_n_layers = config.distill_encoder_n_layers
+    return student_config
+
+
+def build_soft_targets(teacher, X, X2, t=None, alpha=0.):
+    # Probabilities of the teacher, mixed with hard labels where available
+    soft_t = torch.from_numpy(teacher.predict_proba(X, X2)).float()
+    if t is not None:
+        soft_t = (1 - alpha) * soft_t + alpha * t.cpu()
+    return soft_t
+
+
+def distill(config, build_model, teacher, word_features,
+            n_sentence_extra_features, X, X2, t, submit_X, submit_X2):
+    # Soft targets of the teacher over labeled and unlabeled questions
+    soft_t = build_soft_targets(teacher, X, X2, t, config.distill_alpha)
+    soft_submit_t = build_soft_targets(teacher, submit_X, submit_X2)
+
+    student_config = build_student_config(config)
+    student = build_model(
+        student_config, word_features, n_sentence_extra_features)
+    student = student.to_device(config.device)
+    optimizer = torch.optim.Adam(student.parameters(), config.distill_lr)
+    iterator = BatchIterator(
+        (torch.cat([X, submit_X]).to(config.device),
+         torch.cat([X2, submit_X2]).to(config.device),
+         torch.cat([soft_t, soft_submit_t]).to(config.device)),
+        batch_size=config.batchsize, shuffle=True, drop_last=True)
+    for epoch in range(config.distill_epochs):
+        loss_sum = 0.
+        for batch in tqdm(iterator, desc='distill', leave=False):
+            student.train()
+            optimizer.zero_grad()
+            with autocast(config.precision, config.device):
+                loss, output = student.calc_loss(*batch)
+            loss.backward()
+            optimizer.step()
+            loss_sum += output['loss']
+        loss = float(loss_sum / max(len(iterator), 1))
+        tqdm.write(f'distill epoch {epoch}, loss: {loss}')
+
+    # The student serves alone with the out-of-fold threshold of the
+    # teacher. One fitted on X would be in-sample, since the student was
+    # distilled on those rows.
+    distilled = copy(teacher)
+    distilled.models = [student]
+    student.threshold = teacher.threshold_cv
+    distilled.threshold_cv = distilled.threshold = student.threshold
+    return distilled
@@ -0,0 +1,83 @@
+import os
+
+import torch
+import torch.distributed as dist
+from torch.nn.parallel import DistributedDataParallel
+
+
+def init_distributed(backend='gloo'):
+    # Process groups are set up from the environment exported by torchrun
+    if int(os.environ.get('WORLD_SIZE', 1)) > 1 and not dist.is_initialized():
+        dist.init_process_group(backend)
+    return get_rank(), get_world_size()
+
+
+def get_rank():
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_rank()
+    return 0
+
+
+def get_world_size():
+    if dist.is_available() and dist.is_initialized():
+        return dist.get_world_size()
+    return 1
+
+
+def is_main_process():
+    return get_rank() == 0
+
+
+def barrier():
+    if get_world_size() > 1:
+        dist.barrier()
+
+
+def broadcast_object(obj, src=0):
+    # Picklable object of the source rank, e.g. preprocessing artifacts
+    objects = [obj]
+    dist.broadcast_object_list(objects, src=src)
+    return objects[0]
+
+
+def broadcast_buffers(module, src=0):
+    # DDP syncs buffers at the start of each forward, so batch norm
+    # statistics of the last step still differ across ranks
+    for buffer in module.buffers():
+        dist.broadcast(buffer, src=src)
+
+
+def all_gather_object(obj):
+    # Picklable objects of all ranks in rank order, e.g. RNG states
+    if get_world_size() == 1:
+        return [obj]
+    objects = [None] * get_world_size()
+    dist.all_gather_object(objects, obj)
+    return objects
+
+
+def all_reduce_sum(tensor):
+    tensor = tensor.clone()
+    dist.all_reduce(tensor, op=dist.ReduceOp.SUM)
+    return tensor
+
+
+def all_gather_cat(tensor):
+    # Shards may differ in length, so pad them to the longest one
+    size = torch.tensor([len(tensor)], device=tensor.device)
+    sizes = [torch.zeros_like(size) for _ in range(get_world_size())]
+    dist.all_gather(sizes, size)
+    sizes = [int(s) for s in sizes]
+    padded = tensor.new_zeros((max(sizes), *tensor.shape[1:]))
+    padded[:len(tensor)] = tensor
+    gathered = [torch.zeros_like(padded) for _ in sizes]
+    dist.all_gather(gathered, padded)
+    return torch.cat([g[:s] for g, s in zip(gathered, sizes)])
+
+
+class DistributedClassifier(DistributedDataParallel):
+
+    def calc_loss(self, X, X2, t, W=None):
+        # Forward through DDP so that gradients are synchronized
+        y = self(X, X2)
+        return self.module.calc_loss_from_output(y, t)
@@ -0,0 +1,38 @@
+class EarlyStopping(object):
+
+    def __init__(self, patience=None, min_delta=0., mode='max'):
+        assert mode in ('max', 'min')
+        self.patience = patience
+        self.min_delta = min_delta
+        self.mode = mode
+        self.best_score = None
+        self.best_epoch = None
+        self.n_bad_epochs = 0
+
+    def is_improved(self, score):
+        if self.best_score is None:
+            return True
+        if self.mode == 'max':
+            return score > self.best_score + self.min_delta
+        return score < self.best_score - self.min_delta
+
+    def is_near_best(self, score, margin):
+        if self.best_score is None:
+            return True
+        if self.mode == 'max':
+            return score >= self.best_score - margin
+        return score <= self.best_score + margin
+
+    def update(self, score, epoch):
+        improved = self.is_improved(score)
+        if improved:
+            self.best_score = score
+            self.best_epoch = epoch
+            self.n_bad_epochs = 0
+        else:
+            self.n_bad_epochs += 1
+        return improved
+
+    @property
+    def should_stop(self):
+        return self.patience is not None and self.n_bad_epochs >= self.patience
@@ -1,7 +1,13 @@
+import time
+
 import numpy as np
 import pandas as pd
+import torch
 from sklearn import metrics
 
+from qiqc.training.distributed import all_gather_cat, all_reduce_sum
+from qiqc.training.distributed import get_world_size
+
 
 def classification_metrics(ys, ts):
     scores = {}
@@ -29,9 +35,69 @@ def classification_metrics(ys, ts):
     return scores
 
 
+def histogram_classification_metrics(hist):
+    # hist[0] / hist[1] count negatives / positives per probability bin
+    neg, pos = np.asarray(hist, dtype='d')
+    scores = {}
+
+    if neg.sum() > 0 and pos.sum() > 0:
+        # Predict positive for probabilities >= lower edge of each bin
+        n_bins = len(pos)
+        tps = np.cumsum(pos[::-1])[::-1]
+        fps = np.cumsum(neg[::-1])[::-1]
+        thresholds = np.arange(n_bins) / n_bins
+        precs = tps / np.maximum(tps + fps, 1)
+        recs = tps / pos.sum()
+
+        ap = np.sum((recs - np.append(recs[1:], 0)) * precs)
+        tprs = np.append(0, tps[::-1] / pos.sum())
+        fprs = np.append(0, fps[::-1] / neg.sum())
+        rocauc = np.sum((fprs[1:] - fprs[:-1]) * (tprs[1:] + tprs[:-1]) / 2)
+
+        idx = (precs != 0) * (recs != 0)
+        precs, recs, thresholds = precs[idx], recs[idx], thresholds[idx]
+        fbetas = 2 / (1 / precs + 1 / recs)
+        best_idx = np.argmax(fbetas)
+
+        scores['ap'] = ap
+        scores['rocauc'] = rocauc
+        scores['threshold'] = thresholds[best_idx]
+        scores['prec'] = precs[best_idx]
+        scores['rec'] = recs[best_idx]
+        scores['fbeta'] = fbetas[best_idx]
+
+    return scores
+
+
+def compare_inference(reference, candidate, X, X2, t, threshold,
+                      candidate_threshold=None):
+    if candidate_threshold is None:
+        candidate_threshold = threshold
+    scores = {}
+    for name, ensembler, _threshold in [
+            ('reference', reference, threshold),
+            ('candidate', candidate, candidate_threshold)]:
+        start = time.time()
+        y = ensembler.predict_proba(X, X2)
+        scores[f'{name}_time'] = time.time() - start
+        scores[f'{name}_throughput'] = len(X) / scores[f'{name}_time']
+        scores[f'{name}_fbeta'] = classification_metrics(
+            y > _threshold, t).get('fbeta', 0.)
+    scores['fbeta_delta'] = \
+        scores['candidate_fbeta'] - scores['reference_fbeta']
+    scores['speedup'] = scores['reference_time'] / scores['candidate_time']
+    return scores
+
+
 class ClassificationResult(object):
 
-    def __init__(self, name, outdir=None, postfix=None, main_metrics='fbeta'):
+    def __init__(self, name, outdir=None, postfix=None, main_metrics='fbeta',
+                 mode='exact', n_bins=10000):
+        assert mode in {'exact', 'histogram'}
+        self.mode = mode
+        self.n_bins = n_bins
+        self.capacity = 0
+        self.ys, self.ts, self.loss_sum, self.hist = None, None, None, None
         self.initialize()
         self.name = name
         self.postfix = postfix
@@ -41,20 +107,83 @@ class ClassificationResult(object):
         self.n_trained = 0
 
     def initialize(self):
-        self.losses = []
-        self.ys = []
-        self.ts = []
+        # Buffers are kept on the device and reused across epochs
+        self.n_records = 0
+        self.n_batches = 0
+        if self.loss_sum is not None:
+            self.loss_sum.zero_()
+        if self.hist is not None:
+            self.hist.zero_()
+
+    def reserve(self, size):
+        self.capacity = max(self.capacity, size)
+
+    def _allocate(self, y, t, loss):
+        capacity = max(self.capacity, self.n_records + len(y))
+        ys = y.new_empty((capacity, *y.shape[1:]))
+        ts = t.new_empty((capacity, *t.shape[1:]))
+        if self.ys is not None:
+            ys[:self.n_records] = self.ys[:self.n_records]
+            ts[:self.n_records] = self.ts[:self.n_records]
+        else:
+            self.loss_sum = loss.new_zeros(())
+        self.ys, self.ts = ys, ts
+        self.capacity = capacity
 
     def add_record(self, loss, y, t):
-        self.losses.append(loss)
-        self.ys.append(y)
-        self.ts.append(t)
+        y, t, loss = [torch.as_tensor(x).detach() for x in (y, t, loss)]
+        if self.mode == 'histogram':
+            self.add_histogram_record(loss, y, t)
+            return
+        n = len(y)
+        if self.ys is None or self.n_records + n > len(self.ys):
+            self.capacity = max(self.capacity, 2 * self.n_records)
+            self._allocate(y, t, loss)
+        self.ys[self.n_records:self.n_records + n] = y
+        self.ts[self.n_records:self.n_records + n] = t
+        self.loss_sum += loss
+        self.n_records += n
+        self.n_batches += 1
+        self.n_trained += n
+
+    def add_histogram_record(self, loss, y, t):
+        if self.hist is None:
+            self.hist = torch.zeros(
+                2 * self.n_bins, dtype=torch.long, device=y.device)
+            self.loss_sum = loss.new_zeros(())
+        bins = (y.reshape(-1).float() * self.n_bins).long()
+        bins = bins.clamp_(0, self.n_bins - 1)
+        bins += self.n_bins * (t.reshape(-1) > 0.5).long()
+        self.hist += torch.bincount(bins, minlength=2 * self.n_bins)
+        self.loss_sum += loss
+        self.n_records += len(y)
+        self.n_batches += 1
         self.n_trained += len(y)
 
     def calc_score(self, epoch):
-        loss = np.array(self.losses).mean()
-        self.ys, self.ts = np.concatenate(self.ys), np.concatenate(self.ts)
-        score = classification_metrics(self.ys, self.ts)
+        # Single device to host transfer per epoch
+        loss_sum, n_batches = self.loss_sum, self.n_batches
+        hist, ys, ts = self.hist, self.ys, self.ts
+        if self.mode == 'exact':
+            ys, ts = ys[:self.n_records], ts[:self.n_records]
+        if get_world_size() > 1:
+            # Records are sharded across data-parallel ranks
+            loss_sum = all_reduce_sum(loss_sum)
+            n_batches = int(all_reduce_sum(
+                torch.tensor([n_batches], device=loss_sum.device)))
+            if self.mode == 'histogram':
+                hist = all_reduce_sum(hist)
+            else:
+                ys, ts = all_gather_cat(ys), all_gather_cat(ts)
+        loss = (loss_sum / n_batches).item()
+        if self.mode == 'histogram':
+            hist = hist.view(2, self.n_bins).cpu().numpy()
+            ys, ts = None, None
+            score = histogram_classification_metrics(hist)
+        else:
+            ys = ys.to('cpu', copy=True).numpy()
+            ts = ts.to('cpu', copy=True).numpy()
+            score = classification_metrics(ys, ts)
         summary = dict(name=self.name, loss=loss, **score)
         if len(score) > 0:
             if self.summary is None:
@@ -63,8 +192,8 @@ class ClassificationResult(object):
             else:
                 self.summary.loc[epoch] = summary
         if self.best_epoch == epoch:
-            self.best_ys = self.ys
-            self.best_ts = self.ts
+            self.best_ys = ys
+            self.best_ts = ts
         self.initialize()
 
     def get_dict(self):
@@ -0,0 +1,59 @@
+import shutil
+from copy import deepcopy
+from pathlib import Path
+
+import torch
+
+from qiqc.training.checkpoint import load_trainable_state_dict
+from qiqc.training.checkpoint import trainable_state_dict
+
+
+class SnapshotStore(object):
+
+    def __init__(self, outdir=None):
+        # Snapshots are kept in memory when outdir is None
+        self.outdir = None if outdir is None else Path(outdir)
+        self.entries = []
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, model, name, threshold):
+        state = trainable_state_dict(model)
+        if self.outdir is not None:
+            self.outdir.mkdir(parents=True, exist_ok=True)
+            path = self.outdir / f'{name}.pt'
+            torch.save(state, path)
+            state = path
+        self.entries.append(dict(state=state, threshold=threshold))
+
+    def load(self, i):
+        state = self.entries[i]['state']
+        if isinstance(state, Path):
+            # Pages are read lazily while the weights are copied
+            state = torch.load(state, mmap=True, weights_only=True)
+        return state
+
+    def materialize(self, template, indices):
+        # Frozen parameters are shared with the template instead of copied
+        memo = {id(p): p for p in template.parameters() if not p.requires_grad}
+        models = []
+        for i in indices:
+            model = deepcopy(template, memo=dict(memo))
+            load_trainable_state_dict(model, self.load(i))
+            model.threshold = self.entries[i]['threshold']
+            models.append(model)
+        return models
+
+    def clear(self):
+        # Removes the spilled files, e.g. once the chosen snapshots are
+        # materialized. Materialized models hold copies of the weights.
+        if self.outdir is not None:
+            shutil.rmtree(self.outdir, ignore_errors=True)
+        self.entries = []
+
+    def state_dict(self):
+        return list(self.entries)
+
+    def load_state_dict(self, entries):
+        self.entries = list(entries)
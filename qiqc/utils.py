@@ -5,9 +5,7 @@ import shutil
 import sys
 from pathlib import Path
 
-import torch
 import numpy as np
-import prompter
 
 from _qiqc.utils import *  # NOQA
 
@@ -24,6 +22,7 @@ def load_module(filename):
 
 def rmtree_after_confirmation(path, force=False):
     if Path(path).exists():
+        import prompter
         if not force and not prompter.yesno('Overwrite %s?' % path):
             sys.exit(0)
         else:
@@ -37,6 +36,9 @@ def pad_sequence(xs, length, padding_value=0):
 
 
 def set_seed(seed=0):
+    # torch is imported here and in autocast, which keeps
+    # preprocessing-only processes (e.g. workers) free of it
+    import torch
     random.seed(seed)
     os.environ['PYTHONHASHSEED'] = str(seed)
     np.random.seed(seed)
@@ -45,6 +47,13 @@ def set_seed(seed=0):
     torch.backends.cudnn.deterministic = True
 
 
+def autocast(precision, device=None):
+    import torch
+    device_type = 'cpu' if device is None else torch.device(device).type
+    return torch.autocast(
+        device_type, dtype=torch.bfloat16, enabled=precision == 'bf16')
+
+
 class Pipeline(object):
 
     def __init__(self, *modules):
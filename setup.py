@@ -25,7 +25,7 @@ ext_modules = [
 
 setup(
     version='0.0.0',
-    packages=find_packages(exclude=['tests*']),
+    packages=find_packages(exclude=['tests*', 'benchmarks*']),
     install_requires=install_requires,
     scripts=[],
     test_suite='nose.collector',
@@ -19,7 +19,7 @@ class Test_v1_8_1_BiLSTMRnd(TestCase):
     def tearDown(self):
         shutil.rmtree(self.outdir, ignore_errors=True)
 
-    def test_1epoch(self):
+    def train(self, *extra_args):
         topdir = Path(qiqc.__file__).parents[1]
         os.environ['DATADIR'] = str(topdir / 'tests/dummy_data')
         args = f'''
@@ -29,10 +29,14 @@ class Test_v1_8_1_BiLSTMRnd(TestCase):
         --epoch 1
         --cv-part 1
         --test
-        '''.split()
+        '''.split() + list(extra_args)
 
         mod = qiqc.utils.load_module(topdir / 'exec/train.py')
         mod.main(args=args)
+        return topdir
+
+    def test_1epoch(self):
+        self.train()
         modelname = self.modelfile.stem
         df_predicted = pd.read_csv(
             self.outdir / f'{modelname}/default/submission.csv')
@@ -40,3 +44,21 @@ class Test_v1_8_1_BiLSTMRnd(TestCase):
             Path(__file__).parent / 'submission.csv')
         self.assertTrue(
             (df_expected.prediction == df_predicted.prediction).all())
+
+    def test_bundle(self):
+        # Predictions of exec/predict.py with a saved bundle reproduce the
+        # submission of training
+        topdir = self.train('--save-bundle')
+        outdir = self.outdir / f'{self.modelfile.stem}/default'
+        df_expected = pd.read_csv(outdir / 'submission.csv')
+        mod = qiqc.utils.load_module(topdir / 'exec/predict.py')
+        for backend in ['eager', 'torchscript']:
+            output = self.outdir / f'submission_{backend}.csv'
+            mod.main(args=[
+                '--bundle', str(outdir / 'bundle'),
+                '--input', str(topdir / 'tests/dummy_data/test.csv'),
+                '--output', str(output), '--backend', backend])
+            df_predicted = pd.read_csv(output)
+            self.assertTrue((df_expected.qid == df_predicted.qid).all())
+            self.assertTrue(
+                (df_expected.prediction == df_predicted.prediction).all())
@@ -0,0 +1,82 @@
+from unittest import TestCase
+
+import torch
+from parameterized import parameterized
+from torch.utils.data import DataLoader, TensorDataset
+
+from qiqc.datasets import BatchIterator
+
+
+class TestBatchIterator(TestCase):
+
+    def setUp(self):
+        self.X = torch.arange(10)[:, None].repeat(1, 3)
+        self.t = torch.arange(10).float()
+        self.dataset = TensorDataset(self.X, self.t)
+
+    @parameterized.expand([
+        [False, 4],
+        [True, 3],
+    ])
+    def test_iter(self, drop_last, n_batches):
+        iterator = BatchIterator(
+            self.dataset, batch_size=3, drop_last=drop_last)
+        batches = list(iterator)
+        self.assertEqual(len(iterator), n_batches)
+        self.assertEqual(len(batches), n_batches)
+        X = torch.cat([X for X, t in batches])
+        torch.testing.assert_close(X, self.X[:len(X)])
+
+    def test_shuffle(self):
+        iterator = BatchIterator(
+            self.dataset, batch_size=4, shuffle=True, drop_last=True)
+        batches = list(iterator)
+        self.assertEqual(len(batches), 2)
+        for X, t in batches:
+            self.assertEqual(X.shape, (4, 3))
+            torch.testing.assert_close(X[:, 0].float(), t)
+        t = torch.cat([t for X, t in batches])
+        self.assertEqual(len(t.unique()), 8)
+
+    @parameterized.expand([[False], [True]])
+    def test_dataloader_order(self, shuffle):
+        # Same order and global RNG state as a DataLoader with a seed
+        torch.manual_seed(0)
+        expected = [t for X, t in DataLoader(
+            self.dataset, batch_size=4, shuffle=shuffle)]
+        expected_next = torch.rand(1)
+        torch.manual_seed(0)
+        actual = [t for X, t in BatchIterator(
+            self.dataset, batch_size=4, shuffle=shuffle)]
+        torch.testing.assert_close(torch.cat(actual), torch.cat(expected))
+        torch.testing.assert_close(torch.rand(1), expected_next)
+
+    def test_sampler(self):
+        iterator = BatchIterator(
+            self.dataset, batch_size=2, sampler=[9, 0, 5])
+        t = torch.cat([t for X, t in iterator])
+        torch.testing.assert_close(t, torch.tensor([9., 0., 5.]))
+
+    def test_scale_batchsize(self):
+        iterator = BatchIterator(self.dataset, batch_size=2, drop_last=True)
+        self.assertEqual(len(iterator), 5)
+        iterator.batch_size *= 2
+        self.assertEqual(len(iterator), 2)
+        self.assertEqual([len(t) for X, t in iterator], [4, 4])
+
+    @parameterized.expand([
+        [False, [4, 3, 3]],
+        [True, [3, 3, 3]],
+    ])
+    def test_replicas(self, drop_last, n_samples):
+        ts = []
+        for rank in range(3):
+            iterator = BatchIterator(
+                self.dataset, batch_size=2, shuffle=True, drop_last=drop_last,
+                num_replicas=3, rank=rank, seed=0)
+            iterator.set_epoch(1)
+            self.assertEqual(iterator.n_samples, n_samples[rank])
+            ts.append(torch.cat([t for X, t in iterator]))
+        # Ranks draw disjoint shards of a shared permutation
+        t = torch.cat(ts)
+        self.assertEqual(len(t.unique()), len(t))
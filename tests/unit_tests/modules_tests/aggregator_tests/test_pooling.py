@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+import torch
+
+from modules_tests.utils import build_config
+from qiqc.modules import AvgPoolingAggregator, BiRNNLastStateAggregator
+from qiqc.modules import MaxPoolingAggregator, MultiPoolingAggregator
+from qiqc.modules import SumPoolingAggregator
+
+
+class TestMultiPoolingAggregator(TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.hs = torch.randn(4, 7, 6, requires_grad=True)
+        self.mask = torch.arange(7)[None, :] < torch.tensor([[7], [3], [1],
+                                                             [5]])
+
+    def test_forward(self):
+        # Same as the separate aggregators, concatenated
+        _, config = build_config(
+            '--aggregator', 'multi',
+            '--aggregator-poolings', 'max', 'sum', 'avg', 'last')
+        aggregator = MultiPoolingAggregator(config, 6)
+        h = aggregator(self.hs, self.mask)
+        self.assertEqual(aggregator.out_size, 24)
+        self.assertEqual(h.shape, (4, 24))
+        expected = torch.cat([
+            MaxPoolingAggregator()(self.hs, self.mask),
+            SumPoolingAggregator()(self.hs, self.mask),
+            AvgPoolingAggregator()(self.hs, self.mask),
+            BiRNNLastStateAggregator()(self.hs, self.mask)], dim=1)
+        torch.testing.assert_close(h, expected)
+
+    def test_attention(self):
+        _, config = build_config(
+            '--aggregator', 'multi', '--aggregator-poolings', 'attention')
+        aggregator = MultiPoolingAggregator(config, 6)
+        h = aggregator(self.hs, self.mask)
+        self.assertEqual(h.shape, (4, 6))
+
+        h.sum().backward()
+        # Padded positions get no weight and no gradient
+        self.assertTrue((self.hs.grad[~self.mask] == 0).all())
+        self.assertIsNotNone(aggregator.attention.weight.grad)
+        _hs = self.hs.detach().clone()
+        _hs[~self.mask] = 100.
+        with torch.no_grad():
+            torch.testing.assert_close(aggregator(_hs, self.mask), h)
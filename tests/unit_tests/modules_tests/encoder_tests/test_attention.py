@@ -0,0 +1,46 @@
+from unittest import TestCase
+
+import torch
+from parameterized import parameterized
+
+from modules_tests.utils import build_config
+from qiqc.modules import SelfAttentionEncoder
+
+
+class TestSelfAttentionEncoder(TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.h = torch.randn(4, 7, 6, requires_grad=True)
+        self.mask = torch.arange(7)[None, :] < torch.tensor([[7], [3], [1],
+                                                             [5]])
+
+    @parameterized.expand([['sinusoid'], ['none']])
+    def test_forward_backward(self, positional):
+        _, config = build_config(
+            '--encoder', 'attention', '--encoder-positional', positional)
+        encoder = SelfAttentionEncoder(config, 6)
+        h = encoder(self.h, self.mask)
+        self.assertEqual(h.shape, (4, 7, config.encoder_n_hidden))
+        self.assertEqual(encoder.out_size, config.encoder_n_hidden)
+
+        h[self.mask].sum().backward()
+        self.assertTrue(torch.isfinite(self.h.grad).all())
+        # Padded positions get no gradient from valid outputs
+        self.assertTrue((self.h.grad[~self.mask] == 0).all())
+        for name, p in encoder.named_parameters():
+            self.assertIsNotNone(p.grad, name)
+            self.assertTrue(torch.isfinite(p.grad).all(), name)
+
+    def test_mask(self):
+        _, config = build_config('--encoder', 'attention')
+        encoder = SelfAttentionEncoder(config, 6).eval()
+        _h = self.h.detach().clone()
+        _h[~self.mask] = torch.randn(int((~self.mask).sum()), 6)
+        with torch.no_grad():
+            h = encoder(self.h, self.mask)
+            torch.testing.assert_close(
+                encoder(_h, self.mask)[self.mask], h[self.mask])
+            # Rows without tokens do not attend to nothing
+            empty = torch.zeros_like(self.mask)
+            self.assertTrue(torch.isfinite(encoder(self.h, empty)).all())
@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+import torch
+from parameterized import parameterized
+
+from modules_tests.utils import build_config
+from qiqc.modules import CNNEncoder
+
+
+class TestCNNEncoder(TestCase):
+
+    def setUp(self):
+        torch.manual_seed(0)
+        self.h = torch.randn(4, 9, 6, requires_grad=True)
+        self.mask = torch.arange(9)[None, :] < torch.tensor([[9], [3], [1],
+                                                             [5]])
+
+    @parameterized.expand([[1], [2]])
+    def test_forward_backward(self, dilation):
+        _, config = build_config(
+            '--encoder', 'cnn', '--encoder-kernel-sizes', '1', '3', '5',
+            '--encoder-dilation', str(dilation))
+        encoder = CNNEncoder(config, 6)
+        h = encoder(self.h, self.mask)
+        self.assertEqual(encoder.out_size, config.encoder_n_hidden * 3)
+        self.assertEqual(h.shape, (4, 9, encoder.out_size))
+        self.assertTrue((h[~self.mask] == 0).all())
+
+        h.sum().backward()
+        self.assertTrue((self.h.grad[~self.mask] == 0).all())
+        for name, p in encoder.named_parameters():
+            self.assertIsNotNone(p.grad, name)
+
+    def test_mask(self):
+        # Padded positions never leak into the receptive field
+        _, config = build_config('--encoder', 'cnn')
+        encoder = CNNEncoder(config, 6).eval()
+        _h = self.h.detach().clone()
+        _h[~self.mask] = torch.randn(int((~self.mask).sum()), 6)
+        with torch.no_grad():
+            torch.testing.assert_close(
+                encoder(_h, self.mask), encoder(self.h, self.mask))
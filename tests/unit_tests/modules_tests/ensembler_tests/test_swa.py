@@ -0,0 +1,69 @@
+from types import SimpleNamespace
+from unittest import TestCase
+
+import numpy as np
+import torch
+from torch import nn
+
+from modules_tests.utils import build_config, build_inputs, build_models
+from qiqc.datasets import BatchIterator
+from qiqc.modules import WeightAverageEnsembler
+from qiqc.modules.ensembler.swa import average_models, update_bn
+
+
+class TestWeightAverageEnsembler(TestCase):
+
+    def setUp(self):
+        modules, self.config = build_config(
+            '--embedding-dropout1d', '0', '--ensembler-update-bn')
+        self.models = build_models(modules, self.config, n_models=3)
+        self.X, self.X2 = build_inputs(n=16)
+
+    def test_average_models(self):
+        averaged = average_models(self.models)
+        params = [dict(m.named_parameters()) for m in self.models]
+        for name, p in averaged.named_parameters():
+            if p.requires_grad:
+                torch.testing.assert_close(
+                    p, torch.stack([ps[name] for ps in params]).mean(dim=0))
+        # Frozen embeddings are shared instead of averaged
+        self.assertIs(averaged.embedding.module.weight,
+                      self.models[0].embedding.module.weight)
+        self.assertIsNot(averaged.out.weight, self.models[0].out.weight)
+
+    def test_update_bn(self):
+        # Running statistics become the average over equal batches
+        model = self.models[0]
+        bn = next(m for m in model.modules() if isinstance(m, nn.BatchNorm1d))
+        inputs = []
+        handle = bn.register_forward_hook(
+            lambda module, args, output: inputs.append(args[0].detach()))
+        update_bn(model, BatchIterator((self.X, self.X2), batch_size=4))
+        handle.remove()
+
+        self.assertEqual(len(inputs), 4)
+        self.assertFalse(model.training)
+        h = torch.cat(inputs)
+        torch.testing.assert_close(bn.running_mean, h.mean(dim=0))
+        self.assertEqual(bn.momentum, 0.1)
+
+    def test_fit(self):
+        for model, i_cv in zip(self.models, [0, 0, 1]):
+            model.i_cv = i_cv
+        t = torch.from_numpy(
+            np.random.RandomState(0).randint(0, 2, (16, 1)).astype('f'))
+        results = [SimpleNamespace(indices=np.arange(0, 8)),
+                   SimpleNamespace(indices=np.arange(8, 16))]
+        ensembler = WeightAverageEnsembler(self.config, self.models, results)
+        ensembler.fit(self.X, self.X2, t)
+
+        self.assertEqual([m.i_cv for m in ensembler.models], [0, 1])
+        torch.testing.assert_close(
+            ensembler.models[0].out.weight,
+            (self.models[0].out.weight + self.models[1].out.weight) / 2)
+        self.assertEqual(
+            ensembler.threshold,
+            np.mean([m.threshold for m in ensembler.models]))
+        y = ensembler.predict_proba(self.X, self.X2)
+        self.assertEqual(y.shape, (16, 1))
+        self.assertTrue(np.isfinite(y).all())
@@ -0,0 +1,36 @@
+from unittest import TestCase
+
+import torch
+from parameterized import parameterized
+
+from modules_tests.utils import build_config, build_inputs, build_models
+from qiqc.modules import AverageEnsembler, script_ensembler
+from qiqc.modules.export import trace_classifier
+
+
+class TestExport(TestCase):
+
+    @parameterized.expand([['lstm'], ['cnn'], ['attention']])
+    def test_script_ensembler(self, encoder):
+        modules, config = build_config('--encoder', encoder)
+        models = build_models(modules, config)
+        X, X2 = build_inputs(n=8)
+        ensembler = AverageEnsembler(config, models, None)
+        traced = trace_classifier(models[0], X, X2)
+        scripted = script_ensembler(ensembler, X, X2)
+
+        # Padding trimming and batch sizes stay dynamic after tracing
+        for length in [1, 5, 12]:
+            _X, _X2 = build_inputs(n=5, seed=length)
+            _X[:, length:] = 0
+            with torch.no_grad():
+                torch.testing.assert_close(
+                    traced(_X, _X2), models[0](_X, _X2),
+                    rtol=1e-5, atol=1e-5)
+                y = torch.stack([torch.sigmoid(m(_X, _X2))
+                                 for m in models]).mean(dim=0)
+                torch.testing.assert_close(
+                    scripted(_X, _X2), y, rtol=1e-5, atol=1e-5)
+                torch.testing.assert_close(
+                    scripted.predict(_X, _X2),
+                    (y > ensembler.threshold).int())
@@ -0,0 +1,53 @@
+from unittest import TestCase
+from unittest import mock
+
+import numpy as np
+import torch
+from parameterized import parameterized
+
+from modules_tests.utils import build_config, build_inputs, build_models
+from qiqc.modules import AverageEnsembler, InferenceEngine
+
+
+class TestInferenceEngine(TestCase):
+
+    def setUp(self):
+        # Padding-invariant members, so that batches of any length give the
+        # same scores. The last two share an embedding like snapshots.
+        modules, self.config = build_config('--encoder', 'cnn')
+        self.models = build_models(modules, self.config, n_models=3)
+        embedding = self.models[0].embedding.module
+        embedding.weight = torch.nn.Parameter(
+            embedding.weight + 1, requires_grad=False)
+        self.models[2].embedding = self.models[1].embedding
+        self.X, self.X2 = build_inputs(n=11)
+
+    @parameterized.expand([['shared_embedding'], ['threaded']])
+    def test_predict_proba(self, mode):
+        engine = InferenceEngine(self.models, batch_size=4, mode=mode)
+        self.assertEqual([len(group) for group in engine.groups], [1, 2])
+        y = engine.predict_proba(self.X, self.X2)
+        self.assertEqual(y.shape, (11, 1))
+        with torch.no_grad():
+            expected = np.stack([
+                np.mean([torch.sigmoid(m(self.X[i:i + 1], self.X2[i:i + 1]))
+                         .numpy()[0] for m in self.models], axis=0)
+                for i in range(len(self.X))])
+        np.testing.assert_allclose(y, expected, rtol=1e-5, atol=1e-6)
+
+    def test_ensembler(self):
+        ensembler = AverageEnsembler(self.config, self.models, None)
+        y = ensembler.predict_proba(self.X, self.X2)
+        for mode in ['shared_embedding', 'threaded']:
+            ensembler.inference_mode = mode
+            np.testing.assert_allclose(
+                ensembler.predict_proba(self.X, self.X2), y,
+                rtol=1e-5, atol=1e-6)
+
+        # Members are grouped once per engine, not on every call
+        with mock.patch('qiqc.modules.inference.group_by_embedding',
+                        wraps=lambda models: [[m] for m in models]) as group:
+            ensembler.inference_mode = 'shared_embedding'
+            for i in range(3):
+                ensembler.predict_proba(self.X, self.X2)
+        self.assertEqual(group.call_count, 1)
@@ -0,0 +1,42 @@
+from unittest import TestCase
+
+import torch
+from parameterized import parameterized
+
+from modules_tests.utils import build_config, build_inputs, build_models
+from qiqc.modules import AverageEnsembler, quantize_ensembler
+from qiqc.modules import quantize_model
+
+
+class TestQuantization(TestCase):
+
+    @parameterized.expand([['lstm'], ['gru']])
+    def test_quantize_model(self, encoder):
+        modules, config = build_config('--encoder', encoder)
+        model, = build_models(modules, config, n_models=1)
+        quantized = quantize_model(model)
+
+        X, X2 = build_inputs(n=16)
+        with torch.no_grad():
+            y = torch.sigmoid(model(X, X2))
+            _y = torch.sigmoid(quantized(X, X2))
+        torch.testing.assert_close(_y, y, rtol=0, atol=0.02)
+        self.assertFalse(torch.equal(_y, y))
+        # The float model is left untouched
+        self.assertIsInstance(model.out, torch.nn.Linear)
+        self.assertIsInstance(
+            quantized.out, torch.ao.nn.quantized.dynamic.Linear)
+
+    def test_quantize_ensembler(self):
+        modules, config = build_config()
+        models = build_models(modules, config)
+        ensembler = AverageEnsembler(config, models, None)
+        quantized = quantize_ensembler(ensembler)
+
+        X, X2 = build_inputs(n=16)
+        y = ensembler.predict_proba(X, X2)
+        _y = quantized.predict_proba(X, X2)
+        torch.testing.assert_close(
+            torch.from_numpy(_y), torch.from_numpy(y), rtol=0, atol=0.02)
+        self.assertIs(ensembler.models[0], models[0])
+        self.assertEqual(quantized.threshold, ensembler.threshold)
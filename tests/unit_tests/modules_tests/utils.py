@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import numpy as np
+import torch
+
+import qiqc
+from qiqc.utils import load_module
+
+
+MODELFILE = Path(qiqc.__file__).parents[1] / \
+    'models/baseline/v1_8_1_bilstm_w2v_rnd.py'
+
+
+def build_config(*args, modelfile=MODELFILE):
+    # Small models of the baseline model file, with options overridden by
+    # args (e.g. '--encoder', 'cnn')
+    modules = load_module(modelfile)
+    config = modules.ExperimentConfigBuilder().build([
+        '--modelfile', str(modelfile), '--maxlen', '12',
+        '--encoder-n-hidden', '8', '--encoder-n-layers', '2',
+        '--batchsize-valid', '4', *args])
+    return modules, config
+
+
+def build_models(modules, config, n_models=2, n_words=20, n_dims=6,
+                 seed=0):
+    torch.manual_seed(seed)
+    word_features = np.random.RandomState(seed).randn(
+        n_words, n_dims).astype('f')
+    word_features[0] = 0
+    models = []
+    for i in range(n_models):
+        model = modules.build_model(config, word_features, 0)
+        # Non-trivial batch norm statistics
+        for module in model.modules():
+            if isinstance(module, torch.nn.BatchNorm1d):
+                module.running_mean.normal_()
+                module.running_var.uniform_(0.5, 2)
+        model.threshold = 0.5
+        models.append(model.eval())
+    return models
+
+
+def build_inputs(n=10, maxlen=12, n_words=20, seed=0):
+    # Token ids padded to random lengths
+    generator = torch.Generator().manual_seed(seed)
+    X = torch.randint(1, n_words, (n, maxlen), generator=generator)
+    lengths = torch.randint(1, maxlen + 1, (n,), generator=generator)
+    X[torch.arange(maxlen)[None, :] >= lengths[:, None]] = 0
+    X2 = torch.zeros(n, 0)
+    return X, X2
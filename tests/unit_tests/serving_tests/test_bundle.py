@@ -0,0 +1,71 @@
+import tempfile
+from types import SimpleNamespace
+from unittest import TestCase
+
+import numpy as np
+from parameterized import parameterized
+
+from modules_tests.utils import build_config, build_inputs, build_models
+from qiqc.modules import AverageEnsembler
+from qiqc.preprocessing.modules import SentenceExtraFeaturizerWrapper
+from qiqc.registry import AGGREGATOR_REGISTRY, ENCODER_REGISTRY
+from qiqc.serving import ModelBundle, save_bundle
+
+
+WORDS = ['<PAD>', 'what', 'is', 'the', 'best', 'way', 'to', 'learn', 'why',
+         'do', 'people', 'ask', 'questions', 'on', 'quora', 'how', 'can',
+         'i', 'a', 'you']
+TEXTS = [
+    'What is the best way to learn?',
+    'Why do people ask questions on Quora?',
+    'How can I learn',
+    'what',
+]
+
+
+def save_test_bundle(outdir, *args):
+    modules, config = build_config(*args)
+    models = build_models(modules, config, n_words=len(WORDS))
+    ensembler = AverageEnsembler(config, models, None)
+    vocab = SimpleNamespace(token2id={w: i for i, w in enumerate(WORDS)})
+    featurizer = SentenceExtraFeaturizerWrapper(config)
+    featurizer.mean = np.zeros(featurizer.n_dims, 'f')
+    featurizer.std = np.ones(featurizer.n_dims, 'f')
+    X, X2 = build_inputs(n_words=len(WORDS))
+    save_bundle(outdir, config, vocab, featurizer, models, ensembler, X, X2)
+    return ensembler
+
+
+class TestModelBundle(TestCase):
+
+    @parameterized.expand(
+        [('encoder', k) for k in ENCODER_REGISTRY] +
+        [('aggregator', k) for k in AGGREGATOR_REGISTRY])
+    def test_round_trip(self, option, name):
+        with tempfile.TemporaryDirectory() as outdir:
+            ensembler = save_test_bundle(outdir, f'--{option}', name)
+            for backend in ['eager', 'torchscript']:
+                bundle = ModelBundle.load(outdir, backend)
+                expected = ensembler.predict_proba(
+                    *bundle.build_inputs(TEXTS)).ravel()
+                np.testing.assert_allclose(
+                    bundle.predict_proba(TEXTS), expected,
+                    rtol=1e-5, atol=1e-6)
+                np.testing.assert_array_equal(
+                    bundle.predict(TEXTS), expected > ensembler.threshold)
+
+    def test_unknown_tokens(self):
+        with tempfile.TemporaryDirectory() as outdir:
+            save_test_bundle(outdir)
+            bundle = ModelBundle.load(outdir, 'eager')
+            # Unknown tokens are dropped instead of padded in place
+            X, X2 = bundle.build_inputs(
+                ['What is zzz the best way', 'What is the best way'])
+            np.testing.assert_array_equal(X[0], X[1])
+            y = bundle.predict_proba(
+                ['zzz yyy', 'What is zzz the best way', 'xxx'])
+            self.assertTrue(np.isfinite(y).all())
+            self.assertEqual(y[0], 0)
+            self.assertEqual(y[2], 0)
+            self.assertEqual(
+                y[1], bundle.predict_proba(['What is the best way'])[0])
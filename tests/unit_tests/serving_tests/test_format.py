@@ -0,0 +1,42 @@
+import argparse
+import os
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from qiqc.serving.format import MappedVocab, encode_vocab
+from qiqc.serving.format import read_bundle_file, write_bundle_file
+
+
+class TestBundleFile(TestCase):
+
+    def test_round_trip(self):
+        config = argparse.Namespace(maxlen=72, modelfile='model.py')
+        token2id = {'<PAD>': 0, 'what': 1, 'é': 2, 'Why': 3, 'a': 4}
+        arrays = dict(
+            encode_vocab(token2id),
+            word_features=np.random.randn(5, 3).astype('f'),
+            ids=np.arange(7),
+        )
+        meta = dict(threshold=0.4)
+        with tempfile.TemporaryDirectory() as outdir:
+            path = os.path.join(outdir, 'bundle.bin')
+            write_bundle_file(path, config, arrays, meta)
+            _meta, _config, _arrays = read_bundle_file(path)
+
+            self.assertEqual(_meta, meta)
+            self.assertEqual(vars(_config), vars(config))
+            for k, v in arrays.items():
+                np.testing.assert_array_equal(_arrays[k], v)
+                self.assertEqual(_arrays[k].dtype, v.dtype)
+            vocab = MappedVocab(
+                _arrays['vocab_strings'], _arrays['vocab_offsets'],
+                _arrays['vocab_ids'])
+            self.assertEqual(len(vocab), len(token2id))
+            for token, i in token2id.items():
+                self.assertEqual(vocab.get(token), i)
+            self.assertIsNone(vocab.get('how'))
+            self.assertEqual(vocab.get('how', 0), 0)
+            self.assertNotIn('wha', vocab)
+            del _arrays, vocab
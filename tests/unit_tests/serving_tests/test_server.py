@@ -0,0 +1,63 @@
+import asyncio
+import json
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from qiqc.serving import ModelBundle, PredictionServer
+from serving_tests.test_bundle import save_test_bundle
+
+
+def reject_constant(constant):
+    raise ValueError(f'{constant} is not valid JSON')
+
+
+async def request(server, method, path, body=b''):
+    batcher = asyncio.ensure_future(server.batcher.run())
+    tcp_server = await asyncio.start_server(server.handle, '127.0.0.1', 0)
+    port = tcp_server.sockets[0].getsockname()[1]
+    try:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(
+            f'{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n'
+            f'Connection: close\r\n\r\n'.encode() + body)
+        response = await reader.read()
+        writer.close()
+    finally:
+        tcp_server.close()
+        batcher.cancel()
+    head, payload = response.split(b'\r\n\r\n', 1)
+    status = int(head.split()[1])
+    return status, json.loads(payload, parse_constant=reject_constant)
+
+
+class TestPredictionServer(TestCase):
+
+    def test_predict(self):
+        texts = ['What is the best way to learn?', 'Why zzz do people ask',
+                 'zzz yyy']
+        with tempfile.TemporaryDirectory() as outdir:
+            save_test_bundle(outdir)
+            bundle = ModelBundle.load(outdir, 'eager')
+            server = PredictionServer(bundle, max_batch_size=8)
+            status, response = asyncio.run(request(
+                server, 'POST', '/predict',
+                json.dumps(dict(questions=texts)).encode()))
+            expected = bundle.predict_proba(texts)
+
+        self.assertEqual(status, 200)
+        np.testing.assert_allclose(
+            response['probabilities'], expected, rtol=1e-5)
+        self.assertEqual(response['probabilities'][2], 0)
+        self.assertEqual(response['predictions'],
+                         list((expected > bundle.threshold).astype(int)))
+
+    def test_bad_request(self):
+        with tempfile.TemporaryDirectory() as outdir:
+            save_test_bundle(outdir)
+            server = PredictionServer(ModelBundle.load(outdir, 'eager'))
+            status, response = asyncio.run(request(
+                server, 'POST', '/predict', b'{"questions": [1]}'))
+        self.assertEqual(status, 400)
+        self.assertIn('error', response)
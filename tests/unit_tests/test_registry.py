@@ -0,0 +1,46 @@
+import subprocess
+import sys
+from unittest import TestCase
+
+from parameterized import parameterized
+
+from qiqc import registry
+
+
+REGISTRIES = [
+    'NORMALIZER_REGISTRY', 'TOKENIZER_REGISTRY',
+    'WORD_EMBEDDING_FEATURIZER_REGISTRY', 'WORD_EXTRA_FEATURIZER_REGISTRY',
+    'SENTENCE_EXTRA_FEATURIZER_REGISTRY', 'ENCODER_REGISTRY',
+    'AGGREGATOR_REGISTRY']
+
+
+class TestLazyRegistry(TestCase):
+
+    @parameterized.expand([[name] for name in REGISTRIES])
+    def test_resolve(self, name):
+        reg = getattr(registry, name)
+        for k in list(reg.paths):
+            self.assertIsNotNone(reg[k])
+        self.assertEqual(sorted(reg), sorted(reg.paths))
+
+    def test_register(self):
+        reg = registry.LazyRegistry({'a': 'qiqc.utils'})
+        reg['b'] = len
+        self.assertEqual(list(reg), ['b', 'a'])
+        self.assertIn('a', reg)
+        self.assertIs(reg['b'], len)
+        with self.assertRaises(KeyError):
+            reg['a']
+
+    def test_import_preprocessing(self):
+        code = (
+            'import sys\n'
+            'import qiqc\n'
+            'from qiqc.preprocessing.modules import TextNormalizerWrapper\n'
+            'from qiqc.registry import NORMALIZER_REGISTRY, ENCODER_REGISTRY\n'
+            'list(ENCODER_REGISTRY)\n'
+            'NORMALIZER_REGISTRY["lower"]\n'
+            'print(sorted({"torch", "gensim", "nltk", "scipy"}'
+            ' & set(sys.modules)))\n')
+        out = subprocess.check_output([sys.executable, '-c', code])
+        self.assertEqual(out.decode().strip(), '[]')
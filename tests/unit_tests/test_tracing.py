@@ -0,0 +1,65 @@
+import json
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from qiqc.tracing import Tracer
+
+
+class TestTracer(TestCase):
+
+    def test_span(self):
+        tracer = Tracer()
+        with tracer.span('preprocess'):
+            with tracer.span('tokenize', n_items=10):
+                pass
+        for epoch in range(3):
+            with tracer.span('train', n_items=0, epoch=epoch) as span:
+                span['n_items'] += 4
+
+        self.assertEqual(
+            [s['path'] for s in tracer.spans],
+            ['preprocess/tokenize', 'preprocess', 'train', 'train', 'train'])
+        summary = {row['name']: row for row in tracer.summary()}
+        self.assertEqual(
+            list(summary), ['preprocess', 'preprocess/tokenize', 'train'])
+        self.assertEqual(summary['train']['count'], 3)
+        self.assertEqual(summary['train']['n_items'], 12)
+        self.assertIsNone(summary['preprocess']['n_items'])
+        self.assertGreaterEqual(
+            summary['preprocess']['wall'],
+            summary['preprocess/tokenize']['wall'])
+
+        with tempfile.TemporaryDirectory() as outdir:
+            tracer.save(outdir)
+            with open(Path(outdir) / 'trace_chrome.json') as f:
+                events = json.load(f)['traceEvents']
+        events = [e for e in events if e['ph'] == 'X']
+        self.assertEqual(len(events), 5)
+        self.assertEqual(events[2]['args']['epoch'], 0)
+        self.assertEqual(events[2]['ph'], 'X')
+
+    def test_memory(self):
+        tracer = Tracer()
+        with tracer.span('preprocess'):
+            tracer.track('tids', np.zeros((100, 10), 'i'))
+        with tracer.span('fold'):
+            tracer.track('tids', np.zeros((200, 10), 'i'))
+            tracer.track('tokens', [['a', 'b']] * 10)
+
+        report = tracer.memory_report()
+        self.assertEqual(
+            [(a['name'], a['path']) for a in report['top_consumers']],
+            [('tids', 'fold'), ('tokens', 'fold')])
+        self.assertEqual(report['top_consumers'][0]['nbytes'], 8000)
+        self.assertEqual(report['peak_rss'],
+                         max(s['peak_rss'] for s in tracer.spans))
+        self.assertIn(report['peak_stage'], ['preprocess', 'fold'])
+
+    def test_disabled(self):
+        tracer = Tracer(enabled=False)
+        with tracer.span('train', n_items=0) as span:
+            span['n_items'] += 1
+        self.assertEqual(tracer.spans, [])
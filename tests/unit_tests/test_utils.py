@@ -0,0 +1,59 @@
+from unittest import TestCase
+
+import torch
+
+from modules_tests.utils import build_config, build_inputs, build_models
+from qiqc.utils import autocast
+
+
+class TestAutocast(TestCase):
+
+    def setUp(self):
+        modules, config = build_config()
+        self.model, = build_models(modules, config, n_models=1)
+        self.model.train()
+        self.X, self.X2 = build_inputs(n=8)
+        self.t = (torch.arange(8) % 2).float()[:, None]
+        # Dtypes of the linear layers' outputs
+        self.dtypes = []
+        for module in self.model.modules():
+            if isinstance(module, torch.nn.Linear):
+                module.register_forward_hook(
+                    lambda m, args, y: self.dtypes.append(y.dtype))
+
+    def train_step(self, precision):
+        self.model.zero_grad()
+        with autocast(precision):
+            loss, output = self.model.calc_loss(self.X, self.X2, self.t)
+        loss.backward()
+        return loss, output
+
+    def test_bf16(self):
+        loss, output = self.train_step('bf16')
+        self.assertEqual(set(self.dtypes), {torch.bfloat16})
+        # The loss is computed in float32, and parameters and gradients
+        # stay in float32
+        self.assertEqual(loss.dtype, torch.float32)
+        self.assertEqual(output['y'].dtype, torch.float32)
+        for name, p in self.model.named_parameters():
+            self.assertEqual(p.dtype, torch.float32, name)
+            if p.requires_grad:
+                self.assertEqual(p.grad.dtype, torch.float32, name)
+
+    def test_fp32(self):
+        torch.manual_seed(0)
+        loss, _ = self.train_step('fp32')
+        grads = [p.grad.clone() for p in self.model.parameters()
+                 if p.requires_grad]
+        self.assertEqual(set(self.dtypes), {torch.float32})
+
+        # Same as without autocast
+        torch.manual_seed(0)
+        self.model.zero_grad()
+        expected, _ = self.model.calc_loss(self.X, self.X2, self.t)
+        expected.backward()
+        self.assertEqual(loss.item(), expected.item())
+        for p, grad in zip(
+                [p for p in self.model.parameters() if p.requires_grad],
+                grads):
+            torch.testing.assert_close(p.grad, grad, rtol=0, atol=0)
@@ -0,0 +1,67 @@
+from unittest import TestCase
+
+import numpy as np
+import torch
+from parameterized import parameterized
+
+from qiqc.training import ClassificationResult
+from qiqc.training import classification_metrics
+from qiqc.training import histogram_classification_metrics
+
+
+class TestHistogramClassificationMetrics(TestCase):
+
+    @parameterized.expand([
+        [0.1],
+        [0.5],
+    ])
+    def test_call(self, pos_rate):
+        np.random.seed(0)
+        ts = (np.random.uniform(0, 1, 10000) < pos_rate).astype('f')
+        ys = np.clip(np.random.normal(0.3 + 0.3 * ts, 0.2), 0, 1)
+        n_bins = 10000
+        bins = np.minimum((ys * n_bins).astype('i'), n_bins - 1)
+        hist = np.stack([
+            np.bincount(bins[ts == 0], minlength=n_bins),
+            np.bincount(bins[ts == 1], minlength=n_bins),
+        ])
+
+        expected = classification_metrics(ys, ts)
+        actual = histogram_classification_metrics(hist)
+        for key in ['ap', 'rocauc', 'prec', 'rec', 'fbeta', 'threshold']:
+            self.assertAlmostEqual(expected[key], actual[key], places=2)
+
+    def test_single_class(self):
+        hist = np.zeros((2, 10))
+        hist[0, 3] = 5
+        self.assertEqual(histogram_classification_metrics(hist), {})
+
+
+class TestClassificationResult(TestCase):
+
+    @parameterized.expand([
+        ['exact', 0],
+        ['exact', 100],
+        ['histogram', 0],
+    ])
+    def test_calc_score(self, mode, reserve):
+        torch.manual_seed(0)
+        result = ClassificationResult('valid', mode=mode)
+        result.reserve(reserve)
+        for epoch in range(2):
+            ys, ts, losses = [], [], []
+            for i in range(10):
+                y = torch.rand(30, 1)
+                t = (torch.rand(30, 1) < 0.3).float()
+                loss = torch.rand(())
+                result.add_record(loss, y, t)
+                ys.append(y.numpy())
+                ts.append(t.numpy())
+                losses.append(loss.item())
+            result.calc_score(epoch)
+
+            expected = classification_metrics(
+                np.concatenate(ys), np.concatenate(ts))
+            summary = result.summary.loc[epoch]
+            self.assertAlmostEqual(summary.loss, np.mean(losses), places=5)
+            self.assertAlmostEqual(summary.fbeta, expected['fbeta'], places=2)
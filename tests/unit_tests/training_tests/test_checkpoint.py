@@ -0,0 +1,80 @@
+import random
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+import torch
+from torch import nn
+
+from qiqc.training import distributed
+from qiqc.training.checkpoint import Checkpointer
+from qiqc.training.checkpoint import trainable_state_dict
+from qiqc.utils import set_seed
+from training_tests.utils import run_processes
+
+
+def draw():
+    return random.random(), np.random.rand(), torch.rand(1).item()
+
+
+def save_and_resume(outdir):
+    # Ranks start from different RNG states, as after their dropout masks
+    rank = distributed.get_rank()
+    set_seed(rank)
+    model = nn.Linear(4, 1)
+    optimizer = torch.optim.Adam(model.parameters())
+    checkpointer = Checkpointer(outdir, enabled=rank == 0)
+    checkpointer.save_epoch(0, 0, model, optimizer)
+    distributed.barrier()
+    expected = draw()
+    set_seed(100)
+    checkpointer.load_epoch(0, model, optimizer)
+    torch.save(dict(expected=expected, actual=draw()),
+               Path(outdir) / f'rank{rank}.pt')
+
+
+class TestCheckpointer(TestCase):
+
+    def setUp(self):
+        self.model = nn.Sequential(
+            nn.Embedding.from_pretrained(torch.randn(10, 4), freeze=True),
+            nn.Linear(4, 1))
+        self.model.threshold = 0.3
+
+    def test_trainable_state_dict(self):
+        state = trainable_state_dict(self.model)
+        self.assertEqual(sorted(state), ['1.bias', '1.weight'])
+
+    def test_snapshot(self):
+        with tempfile.TemporaryDirectory() as outdir:
+            checkpointer = Checkpointer(outdir)
+            checkpointer.save_fold(0, 'train', 'valid', [self.model])
+            template = nn.Sequential(self.model[0], nn.Linear(4, 1))
+            train, valid, snapshots = checkpointer.load_fold(0, template)
+            self.assertIsNone(checkpointer.load_fold(1, template))
+        self.assertEqual((train, valid), ('train', 'valid'))
+        self.assertEqual(snapshots[0].threshold, 0.3)
+        for p, q in zip(self.model.parameters(), snapshots[0].parameters()):
+            torch.testing.assert_close(p, q)
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as outdir:
+            checkpointer = Checkpointer(outdir)
+            optimizer = torch.optim.Adam(self.model.parameters())
+            checkpointer.save_epoch(0, 2, self.model, optimizer, extra=1)
+            expected = draw()
+            draw()
+            state = checkpointer.load_epoch(0, self.model, optimizer)
+        self.assertEqual((state['epoch'], state['extra']), (2, 1))
+        self.assertEqual(draw(), expected)
+
+    def test_resume_distributed(self):
+        # Every rank continues its own random stream
+        with tempfile.TemporaryDirectory() as outdir:
+            run_processes(save_and_resume, outdir, world_size=2)
+            results = [torch.load(Path(outdir) / f'rank{rank}.pt')
+                       for rank in range(2)]
+        for result in results:
+            self.assertEqual(result['actual'], result['expected'])
+        self.assertNotEqual(results[0]['actual'], results[1]['actual'])
@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+import numpy as np
+import torch
+
+from modules_tests.utils import build_config, build_inputs, build_models
+from qiqc.modules import AverageEnsembler
+from qiqc.training import distill
+from qiqc.training.distillation import build_soft_targets
+from qiqc.training.distillation import build_student_config
+
+
+class TestDistillation(TestCase):
+
+    def setUp(self):
+        self.modules, self.config = build_config(
+            '--encoder', 'cnn', '--batchsize', '4', '--distill-epochs', '1',
+            '--distill-encoder', 'attention',
+            '--distill-encoder-n-hidden', '4',
+            '--distill-encoder-n-layers', '1')
+        models = build_models(self.modules, self.config)
+        models[0].threshold = 0.3
+        self.teacher = AverageEnsembler(self.config, models, None)
+        # As if re-fitted in-sample by the ensembler
+        self.teacher.threshold = 0.7
+        self.X, self.X2 = build_inputs(n=8)
+        self.t = (torch.arange(8) % 2).float()[:, None]
+
+    def test_build_student_config(self):
+        student_config = build_student_config(self.config)
+        self.assertEqual(student_config.encoder, 'attention')
+        self.assertEqual(student_config.encoder_n_hidden, 4)
+        self.assertEqual(student_config.encoder_n_layers, 1)
+        # Options of the student encoder take their defaults
+        self.assertEqual(student_config.encoder_n_heads, 4)
+        self.assertEqual(self.config.encoder, 'cnn')
+        self.assertEqual(self.config.encoder_n_hidden, 8)
+        self.assertFalse(hasattr(self.config, 'encoder_n_heads'))
+
+        _, config = build_config()
+        student_config = build_student_config(config)
+        self.assertEqual(vars(student_config), vars(config))
+
+    def test_soft_target_loss(self):
+        alpha = 0.25
+        soft_t = build_soft_targets(
+            self.teacher, self.X, self.X2, self.t, alpha)
+        p = self.teacher.predict_proba(self.X, self.X2)
+        np.testing.assert_allclose(
+            soft_t.numpy(), (1 - alpha) * p + alpha * self.t.numpy(),
+            rtol=1e-6)
+
+        # Binary cross entropy against the soft targets
+        student = self.teacher.models[0]
+        with torch.no_grad():
+            loss, _ = student.calc_loss(self.X, self.X2, soft_t)
+            y = torch.sigmoid(student(self.X, self.X2)).double().numpy()
+        q = soft_t.double().numpy()
+        expected = -(q * np.log(y) + (1 - q) * np.log(1 - y)).mean()
+        self.assertAlmostEqual(loss.item(), expected, places=5)
+
+    def test_distill(self):
+        submit_X, submit_X2 = build_inputs(n=4, seed=1)
+        word_features = np.random.RandomState(0).randn(20, 6).astype('f')
+        distilled = distill(
+            self.config, self.modules.build_model, self.teacher,
+            word_features, 0, self.X, self.X2, self.t, submit_X, submit_X2)
+
+        student, = distilled.models
+        self.assertIsNot(distilled, self.teacher)
+        self.assertEqual(len(self.teacher.models), 2)
+        self.assertEqual(student.encoder.module.__class__.__name__,
+                         'SelfAttentionEncoder')
+        # The student is not re-thresholded on its training rows, but keeps
+        # the out-of-fold threshold of the teacher
+        self.assertAlmostEqual(student.threshold, 0.4)
+        self.assertAlmostEqual(distilled.threshold, 0.4)
+        self.assertAlmostEqual(distilled.threshold_cv, 0.4)
+        self.assertEqual(self.teacher.threshold, 0.7)
+
+        # Predictions are the student's alone
+        student.eval()
+        with torch.no_grad():
+            expected = torch.sigmoid(student(self.X, self.X2)).numpy()
+        np.testing.assert_allclose(
+            distilled.predict_proba(self.X, self.X2), expected,
+            rtol=1e-5, atol=1e-6)
@@ -0,0 +1,114 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+import sklearn
+import torch
+
+from qiqc.training import distributed
+from qiqc.training import Checkpointer, ClassificationResult
+from qiqc.training.checkpoint import load_trainable_state_dict
+from qiqc.training.checkpoint import trainable_state_dict
+from qiqc.utils import set_seed
+from modules_tests.utils import build_config, build_models
+from training_tests.utils import build_dataset, load_train_module
+from training_tests.utils import run_processes
+
+
+def load_artifacts(config, modules, outdir):
+    rank = distributed.get_rank()
+    set_seed(10 + rank)
+    checkpointer = Checkpointer(
+        config.outdir / 'checkpoint', enabled=rank == 0)
+    artifacts = load_train_module().load_artifacts(
+        config, modules, checkpointer)
+    torch.save(dict(X=artifacts['datasets'][0].X, rand=torch.rand(3)),
+               outdir / f'rank{rank}.pt')
+
+
+def train_fold(config, modules, dataset, fold, outdir):
+    rank = distributed.get_rank()
+    model, = build_models(modules, config, n_models=1)
+    train_result, valid_result, best_models = \
+        load_train_module().train_fold(config, 0, model, dataset, *fold)
+    torch.save(dict(
+        state=trainable_state_dict(model),
+        n_trained=train_result.n_trained,
+        valid_summary=valid_result.summary,
+        n_best_models=len(best_models),
+    ), outdir / f'rank{rank}.pt')
+
+
+class TestDataParallel(TestCase):
+
+    def setUp(self):
+        self.outdir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.outdir, ignore_errors=True)
+
+    def load_results(self, world_size=2):
+        return [torch.load(self.outdir / f'rank{rank}.pt', weights_only=False)
+                for rank in range(world_size)]
+
+    def test_load_artifacts(self):
+        # Every rank gets the preprocessing artifacts and the RNG state of
+        # the main process
+        modules, config = build_config(
+            '--outdir-top', str(self.outdir), '--resume')
+        dataset = build_dataset()
+        set_seed(0)
+        Checkpointer(config.outdir / 'checkpoint').save_preprocessing(
+            dict(datasets=(dataset,)))
+        expected = torch.rand(3)
+        run_processes(load_artifacts, config, modules, self.outdir)
+
+        for result in self.load_results():
+            torch.testing.assert_close(result['X'], dataset.X)
+            torch.testing.assert_close(result['rand'], expected)
+
+    def test_train_fold(self):
+        # Ranks train on equal halves of each batch and stay in sync, and
+        # validation metrics cover the whole valid split
+        modules, config = build_config(
+            '--outdir-top', str(self.outdir), '--batchsize', '4',
+            '--epochs', '2', '--validate-from', '0',
+            # Outputs depend on the padded batches rows are validated in
+            '--batchsize-valid', '1')
+        dataset = build_dataset()
+        splitter = sklearn.model_selection.StratifiedKFold(
+            n_splits=4, shuffle=True, random_state=0)
+        train_indices, valid_indices = next(
+            splitter.split(dataset.df, dataset.df.target))
+        run_processes(
+            train_fold, config, modules, dataset,
+            (train_indices, valid_indices), self.outdir)
+        results = self.load_results()
+
+        for k, v in results[0]['state'].items():
+            torch.testing.assert_close(results[1]['state'][k], v)
+        n_batches = len(train_indices) // config.batchsize
+        for result in results:
+            self.assertEqual(result['n_trained'],
+                             config.epochs * n_batches * config.batchsize // 2)
+        np.testing.assert_allclose(
+            results[0]['valid_summary'].fbeta,
+            results[1]['valid_summary'].fbeta)
+        # Snapshots are only taken by the main process
+        self.assertEqual(
+            [r['n_best_models'] for r in results], [1, 0])
+
+        # Same scores as a single process validating the final model
+        model, = build_models(modules, config, n_models=1)
+        load_trainable_state_dict(model, results[0]['state'])
+        valid_iter = load_train_module().BatchIterator(
+            dataset.build_labeled_dataset(valid_indices),
+            batch_size=config.batchsize_valid)
+        valid_result = ClassificationResult('valid')
+        row = load_train_module().validate(
+            config, model, valid_iter, valid_result, config.epochs - 1)
+        expected = results[0]['valid_summary'].iloc[-1]
+        for key in ['loss', 'ap', 'fbeta', 'threshold']:
+            self.assertAlmostEqual(row[key], expected[key], places=5)
@@ -0,0 +1,24 @@
+from unittest import TestCase
+
+from parameterized import parameterized
+
+from qiqc.training import EarlyStopping
+
+
+class TestEarlyStopping(TestCase):
+
+    @parameterized.expand([
+        [None, 0., None, 1],
+        [2, 0., 3, 1],
+        [2, 0.05, 2, 0],
+    ])
+    def test_update(self, patience, min_delta, stop_epoch, best_epoch):
+        early_stopping = EarlyStopping(patience, min_delta)
+        _stop_epoch = None
+        for epoch, score in enumerate([0.5, 0.54, 0.53, 0.52, 0.51, 0.5]):
+            early_stopping.update(score, epoch)
+            if early_stopping.should_stop:
+                _stop_epoch = epoch
+                break
+        self.assertEqual(_stop_epoch, stop_epoch)
+        self.assertEqual(early_stopping.best_epoch, best_epoch)
@@ -0,0 +1,62 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+import sklearn
+import torch
+
+from qiqc.training.checkpoint import trainable_state_dict
+from qiqc.utils import set_seed
+from modules_tests.utils import build_config, build_models
+from training_tests.utils import build_dataset, load_train_module
+
+
+class TestFoldParallel(TestCase):
+
+    def setUp(self):
+        self.outdir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        shutil.rmtree(self.outdir, ignore_errors=True)
+
+    def test_train_folds_parallel(self):
+        # Fold workers seed each fold with seed + fold index, which a serial
+        # run seeded the same way reproduces
+        modules, config = build_config(
+            '--outdir-top', str(self.outdir), '--batchsize', '4',
+            '--epochs', '2', '--validate-from', '0', '--cv', '2',
+            '--cv-workers', '2', '--ensembler-n-snapshots', '2')
+        dataset = build_dataset()
+        splitter = sklearn.model_selection.StratifiedKFold(
+            n_splits=config.cv, shuffle=True, random_state=config.seed)
+        folds = list(enumerate(splitter.split(dataset.df, dataset.df.target)))
+        mod = load_train_module()
+
+        expected = {}
+        models = build_models(modules, config, n_models=config.cv)
+        for i_cv, fold in folds:
+            set_seed(config.seed + i_cv)
+            expected[i_cv] = mod.train_fold(
+                config, i_cv, models[i_cv], dataset, *fold)
+        models = build_models(modules, config, n_models=config.cv)
+        actual = mod.train_folds_parallel(config, models, dataset, folds)
+
+        self.assertEqual(sorted(actual), [0, 1])
+        for i_cv in range(config.cv):
+            for expected_result, actual_result in zip(
+                    expected[i_cv][:2], actual[i_cv][:2]):
+                np.testing.assert_allclose(
+                    actual_result.summary[['loss', 'ap', 'fbeta']].values,
+                    expected_result.summary[['loss', 'ap', 'fbeta']].values,
+                    rtol=1e-5)
+            self.assertEqual(len(actual[i_cv][2]), 2)
+            for expected_model, actual_model in zip(
+                    expected[i_cv][2], actual[i_cv][2]):
+                self.assertEqual(actual_model.i_cv, i_cv)
+                self.assertEqual(actual_model.threshold,
+                                 expected_model.threshold)
+                expected_state = trainable_state_dict(expected_model)
+                for k, v in trainable_state_dict(actual_model).items():
+                    torch.testing.assert_close(v, expected_state[k])
@@ -0,0 +1,48 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import torch
+from parameterized import parameterized
+from torch import nn
+
+from qiqc.training import SnapshotStore
+
+
+class TestSnapshotStore(TestCase):
+
+    @parameterized.expand([[False], [True]])
+    def test_materialize(self, on_disk):
+        model = nn.Sequential(
+            nn.Embedding.from_pretrained(torch.randn(10, 4), freeze=True),
+            nn.Linear(4, 1))
+        with tempfile.TemporaryDirectory() as outdir:
+            store = SnapshotStore(outdir if on_disk else None)
+            weights = []
+            for epoch in range(3):
+                nn.init.normal_(model[1].weight)
+                weights.append(model[1].weight.detach().clone())
+                store.add(model, f'epoch{epoch}', threshold=epoch / 10)
+            snapshots = store.materialize(model, [2, 0])
+
+        self.assertEqual(len(store), 3)
+        self.assertEqual([m.threshold for m in snapshots], [0.2, 0.])
+        torch.testing.assert_close(snapshots[0][1].weight, weights[2])
+        torch.testing.assert_close(snapshots[1][1].weight, weights[0])
+        # Frozen embeddings are shared instead of copied
+        self.assertIs(snapshots[0][0].weight, model[0].weight)
+        self.assertIsNot(snapshots[0][1].weight, model[1].weight)
+
+    def test_clear(self):
+        model = nn.Linear(4, 1)
+        with tempfile.TemporaryDirectory() as outdir:
+            store = SnapshotStore(Path(outdir) / 'fold0')
+            for epoch in range(2):
+                store.add(model, f'epoch{epoch}', threshold=0.5)
+            snapshots = store.materialize(model, [1])
+            store.clear()
+
+            self.assertFalse((Path(outdir) / 'fold0').exists())
+            self.assertEqual(len(store), 0)
+            # Materialized models do not depend on the removed files
+            torch.testing.assert_close(snapshots[0].weight, model.weight)
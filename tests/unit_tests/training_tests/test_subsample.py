@@ -0,0 +1,52 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from modules_tests.utils import build_config, build_models
+from training_tests.utils import build_dataset, load_train_module
+
+
+class TestValidationSubsample(TestCase):
+
+    def setUp(self):
+        self.outdir = Path(tempfile.mkdtemp())
+        self.modules, self.config = build_config(
+            '--outdir-top', str(self.outdir), '--batchsize', '4',
+            '--epochs', '2', '--validate-from', '0',
+            '--validate-subsample-ratio', '0.5')
+        self.mod = load_train_module()
+
+    def tearDown(self):
+        shutil.rmtree(self.outdir, ignore_errors=True)
+
+    def test_split_subsample(self):
+        targets = np.array([0, 1] * 10)
+        indices = self.mod.split_subsample(
+            self.config, np.arange(20), targets)
+        self.assertEqual(len(indices), 10)
+        self.assertEqual(targets[indices].sum(), 5)
+
+        # A single positive cannot be stratified, but is kept
+        targets = np.array([0] * 19 + [1])
+        indices = self.mod.split_subsample(
+            self.config, np.arange(10, 20), targets)
+        self.assertEqual(len(indices), 6)
+        self.assertEqual(len(set(indices)), 6)
+        self.assertIn(19, indices)
+        self.assertTrue(set(indices) <= set(range(10, 20)))
+
+    def test_train_fold(self):
+        # Valid split of the dummy data with a single positive
+        dataset = build_dataset()
+        targets = dataset.df.target.values
+        valid_indices = np.sort(np.concatenate([
+            np.where(targets == 0)[0][:4], np.where(targets == 1)[0][:1]]))
+        train_indices = np.setdiff1d(np.arange(len(targets)), valid_indices)
+        model, = build_models(self.modules, self.config, n_models=1)
+        train_result, valid_result, best_models = self.mod.train_fold(
+            self.config, 0, model, dataset, train_indices, valid_indices)
+        self.assertEqual(len(train_result.summary), 2)
+        self.assertEqual(len(best_models), 1)
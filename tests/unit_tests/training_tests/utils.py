@@ -0,0 +1,54 @@
+import os
+import socket
+from pathlib import Path
+
+import torch
+import torch.distributed as dist
+
+import qiqc
+from qiqc.datasets import load_qiqc, build_datasets
+from qiqc.training import distributed
+from qiqc.utils import load_module
+from modules_tests.utils import build_inputs
+
+
+TOPDIR = Path(qiqc.__file__).parents[1]
+
+
+def load_train_module():
+    return load_module(TOPDIR / 'exec/train.py')
+
+
+def build_dataset(maxlen=12, n_words=20, seed=0):
+    # Labels of the dummy data with random token ids in place of the
+    # preprocessed texts, for models of modules_tests.utils.build_models
+    os.environ['DATADIR'] = str(TOPDIR / 'tests/dummy_data')
+    train_df, submit_df = load_qiqc()
+    train_dataset, _, _ = build_datasets(train_df, submit_df)
+    X, X2 = build_inputs(len(train_df), maxlen, n_words, seed)
+    train_dataset.tids = X.numpy()
+    train_dataset._X2 = X2.numpy()
+    train_dataset.build(None)
+    return train_dataset
+
+
+def run_processes(fn, *args, world_size=2):
+    # Runs fn(*args) on every rank of a gloo process group in forked
+    # processes, set up from the environment like torchrun does
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    torch.multiprocessing.start_processes(
+        _run_process, args=(fn, args, world_size, port), nprocs=world_size,
+        start_method='fork')
+
+
+def _run_process(rank, fn, args, world_size, port):
+    os.environ.update(
+        RANK=str(rank), WORLD_SIZE=str(world_size),
+        MASTER_ADDR='127.0.0.1', MASTER_PORT=str(port))
+    distributed.init_distributed('gloo')
+    try:
+        fn(*args)
+    finally:
+        dist.destroy_process_group()